@@ -2,11 +2,75 @@
 # source FlaskEnv/bin/activate 
 import os
 import sys
-from flask import Flask, jsonify, request, render_template
+import json
+import time
+import base64
+import hashlib
+import atexit
+import html
+import io
+import csv
+import zlib
+from functools import wraps
+from datetime import date, datetime, timedelta, timezone
+from flask import Flask, jsonify, request, render_template, g, Response, stream_with_context, make_response
 import sqlite3
+from db_pool import ConnectionPool
+from init_db import apply_performance_profile, read_pragmas, DEFAULT_PROFILE
+from migrations import run_migrations, get_schema_version, sync_imported_tasks
+from events import EventBus, ChangeLogPublisher, read_changes, change_payload, format_sse
+from backup import BackupManager, BackupError
+from compression import ResponseCompressor
+from serve import serve, server_settings
+from writer import WriteQueue, WriteQueueTimeout
+from metrics import RequestMetrics, TimedConnection, PROMETHEUS_CONTENT_TYPE
+from query_log import QueryLog
+from read_cache import ReadCache
+
+# Dépendance optionnelle : sans zstandard, seule la compression gzip est disponible
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 app = Flask(__name__)
 
+# Taille du pool de connexions SQLite (surchargeable par variable d'environnement)
+app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('OPAC_DB_POOL_SIZE', 5)))
+app.config.setdefault('DB_POOL_TIMEOUT', float(os.environ.get('OPAC_DB_POOL_TIMEOUT', 10)))
+# Profil de performance SQLite : safe / fast / bulk (cf. init_db.PERFORMANCE_PROFILES)
+app.config.setdefault('DB_PROFILE', DEFAULT_PROFILE)
+# File d'écriture : fenêtre de regroupement des commits (ms) et taille maximale d'un lot
+app.config.setdefault('WRITE_BATCH_WINDOW_MS', float(os.environ.get('OPAC_WRITE_BATCH_WINDOW_MS', 2)))
+app.config.setdefault('WRITE_MAX_BATCH', int(os.environ.get('OPAC_WRITE_MAX_BATCH', 256)))
+# Cache de lecture en mémoire (OPAC_READ_CACHE=0 pour le désactiver) et délai de détection
+# des modifications faites par d'autres processus (ms)
+app.config.setdefault('READ_CACHE', os.environ.get('OPAC_READ_CACHE', '1') != '0')
+app.config.setdefault('READ_CACHE_VALIDATE_MS', float(os.environ.get('OPAC_READ_CACHE_VALIDATE_MS', 1000)))
+# Compression des réponses : taille minimale (octets) et niveaux gzip / zstd
+app.config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('OPAC_COMPRESS_MIN_SIZE', 1024)))
+app.config.setdefault('COMPRESS_GZIP_LEVEL', int(os.environ.get('OPAC_COMPRESS_GZIP_LEVEL', 6)))
+app.config.setdefault('COMPRESS_ZSTD_LEVEL', int(os.environ.get('OPAC_COMPRESS_ZSTD_LEVEL', 3)))
+# Mesures des requêtes (OPAC_METRICS=0 pour les désactiver) : requêtes conservées par route
+# pour les quantiles et en-tête Server-Timing sur les réponses
+app.config.setdefault('METRICS', os.environ.get('OPAC_METRICS', '1') != '0')
+app.config.setdefault('METRICS_WINDOW', int(os.environ.get('OPAC_METRICS_WINDOW', 1024)))
+app.config.setdefault('METRICS_SERVER_TIMING', os.environ.get('OPAC_METRICS_SERVER_TIMING', '1') != '0')
+# Journal des requêtes SQL (OPAC_QUERY_LOG=0 pour le désactiver) : seuil des requêtes lentes (ms)
+app.config.setdefault('QUERY_LOG', os.environ.get('OPAC_QUERY_LOG', '1') != '0')
+app.config.setdefault('SLOW_QUERY_MS', float(os.environ.get('OPAC_SLOW_QUERY_MS', 100)))
+
+# Enregistré avant la compression : la durée mesurée inclut les autres hooks after_request
+request_metrics = None
+if app.config['METRICS']:
+    request_metrics = RequestMetrics()
+    request_metrics.init_app(app)
+
+query_log = QueryLog(threshold=app.config['SLOW_QUERY_MS'] / 1000) if app.config['QUERY_LOG'] else None
+
+compressor = ResponseCompressor()
+compressor.init_app(app)
+
 # ⭐ GESTION DES CHEMINS POUR PYINSTALLER
 def get_base_path():
     """Retourne le chemin de base (dev ou compilé)"""
@@ -19,6 +83,9 @@ def get_base_path():
 
 def get_db_path():
     """Retourne le chemin vers la base de données"""
+    # Chemin imposé par l'environnement (tests, déploiement)
+    if os.environ.get('OPAC_DB_PATH'):
+        return os.environ['OPAC_DB_PATH']
     if getattr(sys, 'frozen', False):
         # En mode compilé, stocker la DB dans le dossier utilisateur
         # (le dossier temporaire de PyInstaller est en lecture seule)
@@ -49,20 +116,175 @@ def init_db_if_needed():
     if not os.path.exists(DB_PATH):
         print("⚠️  Base de données introuvable, initialisation...")
         from init_db import init_database
-        init_database()
+        init_database(DB_PATH, app.config['DB_PROFILE'])
+
+# Connexions du pool et de la file d'écriture : chronométrées si les mesures ou le journal sont actifs
+CONNECTION_FACTORY = TimedConnection if request_metrics or query_log else sqlite3.Connection
+
+def setup_connection(conn):
+    """Configuration d'une nouvelle connexion (pool ou écriture) : profil de performance et journal des requêtes"""
+    apply_performance_profile(conn, app.config['DB_PROFILE'])
+    if isinstance(conn, TimedConnection):
+        conn.query_log = query_log
+
+db_pool = ConnectionPool(
+    DB_PATH,
+    size=app.config['DB_POOL_SIZE'],
+    timeout=app.config['DB_POOL_TIMEOUT'],
+    setup=setup_connection,
+    factory=CONNECTION_FACTORY
+)
+atexit.register(db_pool.close_all)
+
+# Projets et tâches en mémoire, chargés à la première lecture
+read_cache = None
+if app.config['READ_CACHE']:
+    read_cache = ReadCache(
+        DB_PATH,
+        setup=lambda conn: apply_performance_profile(conn, app.config['DB_PROFILE']),
+        validate_interval=app.config['READ_CACHE_VALIDATE_MS'] / 1000
+    )
+    atexit.register(read_cache.close)
+
+# Seul le thread de la file d'écriture modifie la base ; les lectures passent par le pool
+write_queue = WriteQueue(
+    DB_PATH,
+    setup=setup_connection,
+    factory=CONNECTION_FACTORY,
+    window=app.config['WRITE_BATCH_WINDOW_MS'] / 1000,
+    max_batch=app.config['WRITE_MAX_BATCH'],
+    on_commit=read_cache.invalidate if read_cache else None
+)
+atexit.register(write_queue.close)
+
+# Délai suggéré (Retry-After) quand une modification est annulée faute de place dans la file
+WRITE_RETRY_AFTER_SECONDS = 5
+
+# Sauvegardes à chaud : dossier, nombre d'instantanés conservés, intervalle en secondes (0 = désactivé)
+app.config.setdefault('BACKUP_DIR', os.environ.get('OPAC_BACKUP_DIR', os.path.join(os.path.dirname(DB_PATH), 'backups')))
+app.config.setdefault('BACKUP_KEEP', int(os.environ.get('OPAC_BACKUP_KEEP', 10)))
+app.config.setdefault('BACKUP_INTERVAL', float(os.environ.get('OPAC_BACKUP_INTERVAL', 6 * 3600)))
+
+backup_manager = BackupManager(
+    DB_PATH,
+    app.config['BACKUP_DIR'],
+    keep=app.config['BACKUP_KEEP'],
+    interval=app.config['BACKUP_INTERVAL']
+)
+atexit.register(backup_manager.stop)
+
+# Bus d'événements en mémoire alimenté par change_log (GET /api/events)
+event_bus = EventBus()
+change_publisher = ChangeLogPublisher(event_bus)
+
+def migrate_database():
+    """Créer la base si besoin puis appliquer les migrations de schéma en attente"""
+    init_db_if_needed()
+    conn = db_pool.acquire()
+    try:
+        run_migrations(conn)
+        # Les événements diffusés partent de la révision courante
+        change_publisher.publish_pending(conn)
+    finally:
+        db_pool.release(conn)
+
+migrate_database()
 
 def get_db():
-    """Connexion à la base de données avec gestion des erreurs"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        # Activer les clés étrangères
-        conn.execute('PRAGMA foreign_keys = ON')
-        return conn
-    except sqlite3.Error as e:
-        print(f"❌ Erreur connexion DB: {e}")
-        init_db_if_needed()
-        raise
+    """Connexion à la base de données (empruntée au pool, une par contexte d'application)"""
+    if 'db' not in g:
+        try:
+            g.db = db_pool.acquire()
+        except sqlite3.Error as e:
+            print(f"❌ Erreur connexion DB: {e}")
+            init_db_if_needed()
+            raise
+    return g.db
+
+def run_write(fn, *args):
+    """Exécuter fn(conn, *args) sur le thread d'écriture, attendre le commit du lot et retourner son résultat"""
+    if request_metrics is None:
+        return write_queue.execute(fn, *args)
+    started = time.perf_counter()
+    try:
+        return write_queue.execute(fn, *args)
+    finally:
+        request_metrics.record_write(time.perf_counter() - started)
+
+def error_response(e):
+    """Réponse d'erreur d'une route d'écriture : 503 si la modification a été annulée
+    faute de place dans la file d'écriture (rien n'a été écrit, le client peut réessayer)"""
+    if isinstance(e, WriteQueueTimeout):
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = str(WRITE_RETRY_AFTER_SECONDS)
+        return response, 503
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+def execute_write(sql, params=()):
+    """Requête d'écriture unique via le thread d'écriture, retourne le nombre de lignes modifiées"""
+    return run_write(lambda conn: conn.execute(sql, params).rowcount)
+
+@app.after_request
+def publish_changes(response):
+    """Diffuser sur le bus d'événements les modifications faites par une requête d'écriture"""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and request.path.startswith('/api/') and response.status_code < 400:
+        try:
+            change_publisher.publish_pending(get_db())
+        except sqlite3.Error as e:
+            print(f"❌ Erreur publication des événements: {e}")
+    return response
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Rendre la connexion au pool à la fin de la requête"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# ==================== CACHE HTTP (ETag) ====================
+
+def read_revisions(conn, tables):
+    """Compteurs de modification des tables (maintenus par triggers, cf. migration 4)"""
+    placeholders = ', '.join('?' * len(tables))
+    rows = conn.execute(
+        f'SELECT name, revision FROM data_revisions WHERE name IN ({placeholders}) ORDER BY name',
+        tables
+    ).fetchall()
+    return [f"{row['name']}:{row['revision']}" for row in rows]
+
+def table_revisions(tables):
+    """Révisions des tables lues : depuis le cache de lecture s'il est actif (sans accès à la base)"""
+    if read_cache is not None:
+        return read_cache.revisions(tables)
+    return read_revisions(get_db(), tables)
+
+def etag_cached(*tables, time_sensitive=False):
+    """Décorateur de route GET : ETag faible dérivé des révisions des tables lues.
+    Répond 304 sans exécuter la route si le client possède déjà la version courante.
+    Faible sur toutes les réponses (200, 304, compressées ou non) : le validateur reste le même
+    quel que soit l'encodage choisi par ResponseCompressor.
+    time_sensitive : le résultat dépend aussi de l'heure (échéances), l'ETag change chaque minute."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = [request.full_path, *table_revisions(tables)]
+            if time_sensitive:
+                parts.append(int(time.time() // 60))
+            etag = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+            
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            # Le navigateur revalide systématiquement (If-None-Match) au lieu de réutiliser sa copie
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
 
 # ==================== HEALTH CHECK ====================
 
@@ -73,7 +295,7 @@ def health_check():
         conn = get_db()
         # Test de lecture
         conn.execute('SELECT 1').fetchone()
-        conn.close()
+        pragmas = read_pragmas(conn)
         
         # Informations sur la base
         db_size = os.path.getsize(DB_PATH) / 1024  # Ko
@@ -84,7 +306,15 @@ def health_check():
             'database': {
                 'path': DB_PATH,
                 'size_kb': round(db_size, 2),
-                'exists': os.path.exists(DB_PATH)
+                'exists': os.path.exists(DB_PATH),
+                'pool': db_pool.stats(),
+                'writer': write_queue.stats(),
+                'read_cache': read_cache.stats() if read_cache else None,
+                'schema_version': get_schema_version(conn),
+                'profile': {
+                    'name': app.config['DB_PROFILE'],
+                    'pragmas': pragmas
+                }
             }
         })
     except Exception as e:
@@ -121,13 +351,57 @@ def settings():
 
 # ==================== PROJECTS ====================
 
+# Statistiques de tâches par projet, calculées en une seule requête agrégée
+# Compteurs lus dans project_stats (maintenue par triggers, cf. migration 6) ;
+# les tâches en retard dépendent de l'heure : index partiel idx_tasks_open_deadline
+PROJECTS_WITH_STATS_SQL = '''
+    SELECT p.*,
+        COALESCE(s.total, 0) AS stat_total,
+        COALESCE(s.todo, 0) AS stat_todo,
+        COALESCE(s.in_progress, 0) AS stat_in_progress,
+        COALESCE(s.done, 0) AS stat_done,
+        COALESCE(s.load, 0) AS stat_load,
+        COALESCE(o.overdue, 0) AS stat_overdue
+    FROM projects p
+    LEFT JOIN project_stats s ON s.project_id = p.id
+    LEFT JOIN (
+        SELECT project_id, COUNT(*) AS overdue FROM tasks
+        WHERE status != 'done' AND deadline < datetime('now')
+        GROUP BY project_id
+    ) o ON o.project_id = p.id
+'''
+
+def project_with_stats(row):
+    """Convertir une ligne de PROJECTS_WITH_STATS_SQL en projet avec un objet 'stats'"""
+    project = {}
+    stats = {}
+    for key in row.keys():
+        if key.startswith('stat_'):
+            stats[key[len('stat_'):]] = row[key]
+        else:
+            project[key] = row[key]
+    project['stats'] = stats
+    return project
+
 @app.route('/api/projects', methods=['GET'])
+@etag_cached('projects', 'tasks', time_sensitive=True)
 def get_projects():
-    """GET /api/projects - Récupérer tous les projets"""
+    """GET /api/projects?include=stats - Récupérer tous les projets (avec statistiques optionnelles)"""
     try:
-        conn = get_db()
-        projects = conn.execute('SELECT * FROM projects ORDER BY creation_date DESC').fetchall()
-        conn.close()
+        include = request.args.get('include', '').split(',')
+        
+        if 'stats' in include:
+            rows = get_db().execute(PROJECTS_WITH_STATS_SQL + ' ORDER BY p.creation_date DESC').fetchall()
+            return jsonify({
+                'success': True,
+                'data': [project_with_stats(row) for row in rows]
+            })
+        
+        # Liste des <select> de projets : servie par le cache de lecture sans accès à la base
+        if read_cache is not None:
+            return jsonify({'success': True, 'data': read_cache.projects()})
+        
+        projects = get_db().execute('SELECT * FROM projects ORDER BY creation_date DESC').fetchall()
         return jsonify({
             'success': True,
             'data': [dict(project) for project in projects]
@@ -136,12 +410,22 @@ def get_projects():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
+@etag_cached('projects', 'tasks', time_sensitive=True)
 def get_project(project_id):
-    """GET /api/projects/:id - Récupérer un projet"""
+    """GET /api/projects/:id?include=stats - Récupérer un projet (avec statistiques optionnelles)"""
     try:
-        conn = get_db()
-        project = conn.execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
-        conn.close()
+        include = request.args.get('include', '').split(',')
+        
+        if 'stats' in include:
+            project = get_db().execute(PROJECTS_WITH_STATS_SQL + ' WHERE p.id = ?', (project_id,)).fetchone()
+            if not project:
+                return jsonify({'success': False, 'error': 'Projet introuvable'}), 404
+            return jsonify({'success': True, 'data': project_with_stats(project)})
+        
+        if read_cache is not None:
+            project = read_cache.project(project_id)
+        else:
+            project = get_db().execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
         
         if not project:
             return jsonify({'success': False, 'error': 'Projet introuvable'}), 404
@@ -150,26 +434,27 @@ def get_project(project_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def insert_project(conn, data):
+    """Insérer un projet (sans commit), retourne son id"""
+    cursor = conn.execute(
+        'INSERT INTO projects (name, description) VALUES (?, ?)',
+        (data['name'], data.get('description', ''))
+    )
+    return cursor.lastrowid
+
 @app.route('/api/projects', methods=['POST'])
 def create_project():
     """POST /api/projects - Créer un projet"""
     try:
         data = request.json
-        conn = get_db()
-        cursor = conn.execute(
-            'INSERT INTO projects (name, description) VALUES (?, ?)',
-            (data['name'], data.get('description', ''))
-        )
-        conn.commit()
-        project_id = cursor.lastrowid
-        conn.close()
+        project_id = run_write(insert_project, data)
         
         return jsonify({
             'success': True,
             'data': {'id': project_id}
         }), 201
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/projects/<int:project_id>/name', methods=['PATCH'])
 def update_project_name(project_id):
@@ -181,17 +466,14 @@ def update_project_name(project_id):
         if len(name) == 0:
             return jsonify({'success': False, 'error': 'Le projet doit avoir un nom.'}), 400
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE projects SET name = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (name, project_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/projects/<int:project_id>/description', methods=['PATCH'])
 def update_project_description(project_id):
@@ -200,87 +482,290 @@ def update_project_description(project_id):
         data = request.json
         description = data.get('description', '')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE projects SET description = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (description, project_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/projects/<int:project_id>/progress-date', methods=['PATCH'])
 def update_project_progress_date(project_id):
     """PATCH /api/projects/:id/progress-date - Mettre à jour la date de progression"""
     try:
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE projects SET last_progress_date = CURRENT_TIMESTAMP WHERE id = ?',
             (project_id,)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/projects/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
     """DELETE /api/projects/:id - Supprimer un projet"""
     try:
-        conn = get_db()
-        result = conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
-        conn.commit()
+        deleted = execute_write('DELETE FROM projects WHERE id = ?', (project_id,))
         
-        if result.rowcount == 0:
-            conn.close()
+        if deleted == 0:
             return jsonify({'success': False, 'error': 'Projet introuvable'}), 404
         
-        conn.close()
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/projects', methods=['DELETE'])
 def clear_all_projects():
     """DELETE /api/projects - Supprimer tous les projets"""
     try:
-        conn = get_db()
-        result = conn.execute('DELETE FROM projects')
-        conn.commit()
+        deleted = execute_write('DELETE FROM projects')
         
-        if result.rowcount == 0:
-            conn.close()
+        if deleted == 0:
             return jsonify({'success': False, 'error': 'Réinitialisation échouée'}), 400
         
-        conn.close()
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 # ==================== TASKS ====================
 
+def tasks_select_sql():
+    """Début de requête SELECT sur les tâches (alias t), avec le nom du projet si include=project"""
+    include = request.args.get('include', '').split(',')
+    if 'project' in include:
+        return 'SELECT t.*, p.name AS project_name FROM tasks t LEFT JOIN projects p ON p.id = t.project_id'
+    return 'SELECT t.* FROM tasks t'
+
+# Taille de page maximale pour la pagination par curseur
+MAX_PAGE_SIZE = 1000
+
+# Nombre de lignes NDJSON regroupées par écriture lors du streaming
+STREAM_CHUNK_ROWS = 200
+
+def encode_cursor(row):
+    """Curseur opaque de pagination (clé : creation_date, id)"""
+    raw = f"{row['creation_date']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Décoder un curseur, lève ValueError s'il est invalide"""
+    try:
+        creation_date, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return creation_date, int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Curseur invalide') from e
+
+def stream_ndjson(sql, params):
+    """Générer les lignes d'une requête au format NDJSON, au fil du curseur.
+    Utilise sa propre connexion du pool : celle de g est rendue avant la fin du streaming."""
+    conn = db_pool.acquire()
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+            if not rows:
+                break
+            yield ''.join(json.dumps(dict(row), ensure_ascii=False) + '\n' for row in rows)
+    finally:
+        db_pool.release(conn)
+
+# Tris autorisés sur GET /api/tasks (préfixe "-" pour un ordre décroissant)
+# priority : ordre croissant = la plus importante d'abord (comme le Kanban)
+TASK_SORTS = {
+    'creation_date': ['t.creation_date'],
+    'deadline': ['t.deadline IS NULL', 't.deadline'],  # tâches sans échéance en dernier
+    'priority': ["CASE t.priority WHEN 'high' THEN 1 WHEN 'medium' THEN 2 WHEN 'low' THEN 3 ELSE 2 END"],
+    'title': ['t.title COLLATE NOCASE'],
+    'last_update_date': ['COALESCE(t.last_update_date, t.creation_date)'],
+}
+DEFAULT_TASK_SORT = '-creation_date'
+
+TASK_STATUSES = ('todo', 'in-progress', 'done')
+
+# Pseudo-statut "active" : tâches non terminées
+ACTIVE_STATUSES = ('todo', 'in-progress')
+
+def split_param(name):
+    """Paramètre de requête multi-valué : ?status=todo,done"""
+    value = request.args.get(name, '')
+    return [item for item in value.split(',') if item and item != 'all']
+
+def date_bound(name, value, upper=False):
+    """Borne d'un filtre de date (?deadline_from=...) au format canonique des colonnes.
+    Une date seule (AAAA-MM-JJ) couvre toute la journée. Retourne (opérateur, valeur),
+    lève ValueError si la date est illisible."""
+    try:
+        day = date.fromisoformat(value.strip())
+    except ValueError:
+        day = None
+    if day is not None:
+        if upper:
+            return '<', (day + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+        return '>=', day.strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        bound = normalize_deadline(value)
+    except ValueError:
+        raise ValueError(f'{name} invalide : {value!r}')
+    return ('<=' if upper else '>='), bound
+
+def status_filter():
+    """Statuts demandés (?status=), le pseudo-statut "active" remplacé par les statuts non terminés"""
+    statuses = split_param('status')
+    if 'active' in statuses:
+        statuses = [status for status in statuses if status != 'active'] + list(ACTIVE_STATUSES)
+    return statuses
+
+def build_task_filters():
+    """Traduire les filtres de GET /api/tasks en clauses SQL indexables (alias t).
+    Retourne (where, params), lève ValueError si un paramètre est invalide."""
+    where = []
+    params = []
+
+    statuses = status_filter()
+    if statuses:
+        where.append(f"t.status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+
+    try:
+        project_ids = [int(project_id) for project_id in split_param('project_id')]
+    except ValueError:
+        raise ValueError('project_id doit être un entier')
+    if project_ids:
+        where.append(f"t.project_id IN ({', '.join('?' * len(project_ids))})")
+        params.extend(project_ids)
+
+    priorities = split_param('priority')
+    if priorities:
+        where.append(f"t.priority IN ({', '.join('?' * len(priorities))})")
+        params.extend(priorities)
+
+    responsible = request.args.get('responsible')
+    if responsible:
+        where.append('t.responsible = ?')
+        params.append(responsible)
+
+    # Comparaisons directes sur les colonnes (pas de datetime(colonne)) pour utiliser les index :
+    # les bornes sont ramenées au format canonique 'AAAA-MM-JJ HH:MM:SS' des valeurs stockées
+    for prefix, column in (('deadline', 't.deadline'), ('created', 't.creation_date')):
+        for suffix, upper in (('from', False), ('to', True)):
+            name = f'{prefix}_{suffix}'
+            value = request.args.get(name)
+            if value:
+                operator, bound = date_bound(name, value, upper)
+                where.append(f'{column} {operator} ?')
+                params.append(bound)
+
+    return where, params
+
+def build_task_order_by(sort):
+    """Clause ORDER BY pour un tri de TASK_SORTS, lève ValueError si le tri est inconnu"""
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in TASK_SORTS:
+        raise ValueError(f"Tri inconnu : {key} (attendu : {', '.join(TASK_SORTS)})")
+
+    direction = 'DESC' if descending else 'ASC'
+    terms = TASK_SORTS[key]
+    if key == 'deadline':
+        # Les tâches sans échéance restent en dernier quel que soit l'ordre
+        terms = [terms[0], f'{terms[1]} {direction}']
+    else:
+        terms = [f'{term} {direction}' for term in terms]
+    return 'ORDER BY ' + ', '.join(terms + [f't.id {direction}'])
+
+# Paramètres de GET /api/tasks que le cache de lecture sait servir (tri par défaut, sans pagination)
+CACHEABLE_TASK_ARGS = {'status', 'project_id', 'include'}
+
+def cached_tasks():
+    """Tâches de GET /api/tasks lues dans le cache, None si la requête doit passer par SQL"""
+    if read_cache is None or not set(request.args) <= CACHEABLE_TASK_ARGS:
+        return None
+    try:
+        project_ids = [int(project_id) for project_id in split_param('project_id')]
+    except ValueError:
+        return None
+    return read_cache.tasks(
+        statuses=status_filter() or None,
+        project_ids=project_ids or None,
+        with_project_name='project' in request.args.get('include', '').split(',')
+    )
+
 @app.route('/api/tasks', methods=['GET'])
+@etag_cached('tasks', 'projects')
 def get_tasks():
-    """GET /api/tasks?project_id=X - Récupérer les tâches (avec filtre optionnel)"""
+    """GET /api/tasks - Récupérer les tâches
+
+    Paramètres optionnels :
+    - status (todo, in-progress, done, active), project_id, priority : valeurs séparées par des virgules
+    - responsible, deadline_from / deadline_to, created_from / created_to : filtres
+    - sort : creation_date, deadline, priority, title, last_update_date (préfixe "-" = décroissant)
+    - include=project : joindre le nom du projet
+    - limit / after : pagination par curseur (tri par défaut uniquement), renvoie next_cursor
+    - format=ndjson : réponse streamée, une tâche JSON par ligne
+    """
     try:
-        project_id = request.args.get('project_id')
+        # Liste complète, par projet (Kanban) ou par statut : servie par le cache de lecture
+        tasks = cached_tasks()
+        if tasks is not None:
+            return jsonify({'success': True, 'data': tasks})
         
-        conn = get_db()
+        after = request.args.get('after')
+        output_format = request.args.get('format', 'json')
+        sort = request.args.get('sort', DEFAULT_TASK_SORT)
         
-        if project_id:
-            tasks = conn.execute(
-                'SELECT * FROM tasks WHERE project_id = ? ORDER BY creation_date DESC',
-                (project_id,)
-            ).fetchall()
-        else:
-            tasks = conn.execute('SELECT * FROM tasks ORDER BY creation_date DESC').fetchall()
+        try:
+            limit = int(request.args['limit']) if 'limit' in request.args else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit doit être un entier'}), 400
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'success': False, 'error': f'limit doit être compris entre 1 et {MAX_PAGE_SIZE}'}), 400
+        
+        try:
+            where, params = build_task_filters()
+            order_by = build_task_order_by(sort)
+            
+            if after:
+                if sort != DEFAULT_TASK_SORT:
+                    raise ValueError(f'La pagination par curseur impose sort={DEFAULT_TASK_SORT}')
+                creation_date, last_id = decode_cursor(after)
+                where.append('(t.creation_date, t.id) < (?, ?)')
+                params.extend([creation_date, last_id])
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        sql = tasks_select_sql()
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ' + order_by
         
-        conn.close()
+        if output_format == 'ndjson':
+            if limit:
+                sql += ' LIMIT ?'
+                params.append(limit)
+            return Response(
+                stream_with_context(stream_ndjson(sql, params)),
+                mimetype='application/x-ndjson'
+            )
+        
+        if limit:
+            # Une ligne de plus pour savoir s'il existe une page suivante
+            sql += ' LIMIT ?'
+            params.append(limit + 1)
+        
+        conn = get_db()
+        tasks = conn.execute(sql, params).fetchall()
+        
+        if limit:
+            has_more = len(tasks) > limit
+            tasks = tasks[:limit]
+            return jsonify({
+                'success': True,
+                'data': [dict(task) for task in tasks],
+                'next_cursor': encode_cursor(tasks[-1]) if has_more else None
+            })
         
         return jsonify({
             'success': True,
@@ -290,12 +775,14 @@ def get_tasks():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
+@etag_cached('tasks')
 def get_task(task_id):
     """GET /api/tasks/:id - Récupérer une tâche"""
     try:
-        conn = get_db()
-        task = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
-        conn.close()
+        if read_cache is not None:
+            task = read_cache.task(task_id)
+        else:
+            task = get_db().execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
         
         if not task:
             return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
@@ -305,12 +792,12 @@ def get_task(task_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/tasks/high-priority', methods=['GET'])
+@etag_cached('tasks', 'projects')
 def get_high_priority_tasks():
-    """GET /api/tasks/high-priority - Récupérer les tâches prioritaires"""
+    """GET /api/tasks/high-priority?include=project - Récupérer les tâches prioritaires"""
     try:
         conn = get_db()
-        tasks = conn.execute("SELECT * FROM tasks WHERE priority = 'high' AND status != 'done'").fetchall()
-        conn.close()
+        tasks = conn.execute(f"{tasks_select_sql()} WHERE t.priority = 'high' AND t.status != 'done'").fetchall()
         
         if not tasks:
             return jsonify({'success': False, 'error': 'Aucune tâche importante'}), 404
@@ -319,18 +806,27 @@ def get_high_priority_tasks():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Fenêtre par défaut (en jours) des tâches à échéance proche
+DUE_SOON_DEFAULT_DAYS = 2
+DUE_SOON_MAX_DAYS = 365
+
 @app.route('/api/tasks/due-soon', methods=['GET'])
+@etag_cached('tasks', 'projects', time_sensitive=True)
 def get_due_soon_tasks():
-    """GET /api/tasks/due-soon - Récupérer les tâches à échéance proche"""
+    """GET /api/tasks/due-soon?days=N&include=project - Récupérer les tâches à échéance proche"""
     try:
+        days = request.args.get('days', DUE_SOON_DEFAULT_DAYS, type=int)
+        if not 0 <= days <= DUE_SOON_MAX_DAYS:
+            return jsonify({'success': False, 'error': f'days doit être compris entre 0 et {DUE_SOON_MAX_DAYS}'}), 400
+        
         conn = get_db()
-        tasks = conn.execute("""
-            SELECT * FROM tasks
-            WHERE datetime(deadline) < datetime('now', '+2 days')
-            AND status != 'done'
-            ORDER BY deadline ASC
-        """).fetchall()
-        conn.close()
+        # deadline est stockée au format canonique : comparaison directe, index utilisable
+        tasks = conn.execute(f"""
+            {tasks_select_sql()}
+            WHERE t.deadline < datetime('now', ?)
+            AND t.status != 'done'
+            ORDER BY t.deadline ASC
+        """, (f'+{days} days',)).fetchall()
         
         if not tasks:
             return jsonify({'success': False, 'error': 'Aucune tâche à échéance proche'}), 404
@@ -339,37 +835,120 @@ def get_due_soon_tasks():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def normalize_deadline(value):
+    """Normaliser une échéance au format canonique 'AAAA-MM-JJ HH:MM:SS' (celui de datetime() en SQLite).
+    Retourne None pour une échéance vide, lève ValueError si la date est illisible."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'Échéance invalide : {value!r}')
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f'Échéance invalide : {value!r}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def insert_task(conn, data):
+    """Insérer une tâche (sans commit), retourne son id"""
+    cursor = conn.execute(
+        '''INSERT INTO tasks 
+        (title, description, deadline, status, priority, load, responsible, project_id) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        (
+            data['title'],
+            data.get('description', ''),
+            normalize_deadline(data.get('deadline')),
+            data.get('status', 'todo'),
+            data.get('priority', 'haute'),
+            data.get('load', 0.0),
+            data.get('responsible', ''),
+            data.get('project_id')
+        )
+    )
+    return cursor.lastrowid
+
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
     """POST /api/tasks - Créer une tâche"""
     try:
         data = request.json
-        conn = get_db()
-        cursor = conn.execute(
-            '''INSERT INTO tasks 
-            (title, description, deadline, status, priority, load, responsible, project_id) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-            (
-                data['title'],
-                data.get('description', ''),
-                data.get('deadline'),
-                data.get('status', 'todo'),
-                data.get('priority', 'haute'),
-                data.get('load', 0.0),
-                data.get('responsible', ''),
-                data.get('project_id')
-            )
-        )
-        conn.commit()
-        task_id = cursor.lastrowid
-        conn.close()
+        task_id = run_write(insert_task, data)
         
         return jsonify({
             'success': True,
             'data': {'id': task_id}
         }), 201
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
+
+# Colonnes modifiables via PATCH /api/tasks/:id
+TASK_UPDATABLE_FIELDS = ('title', 'description', 'deadline', 'status', 'priority', 'load', 'responsible', 'project_id')
+
+def update_task_fields(conn, task_id, data):
+    """Appliquer un sous-ensemble de colonnes à une tâche (sans commit).
+    Retourne False si la tâche n'existe pas, lève ValueError si les données sont invalides."""
+    if not isinstance(data, dict):
+        raise ValueError('Données invalides')
+    unknown = [key for key in data if key not in TASK_UPDATABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Champ(s) non modifiable(s) : {', '.join(unknown)}")
+
+    fields = {key: data[key] for key in TASK_UPDATABLE_FIELDS if key in data}
+    if not fields:
+        raise ValueError('Aucun champ à mettre à jour.')
+    if 'title' in fields and not fields['title']:
+        raise ValueError('La tâche doit avoir un titre.')
+    if 'status' in fields and fields['status'] not in TASK_STATUSES:
+        raise ValueError(f"Statut invalide : {fields['status']!r}")
+    if 'deadline' in fields:
+        fields['deadline'] = normalize_deadline(fields['deadline'])
+
+    existing = conn.execute('SELECT status, project_id FROM tasks WHERE id = ?', (task_id,)).fetchone()
+    if not existing:
+        return False
+
+    status_changed = 'status' in fields and fields['status'] != existing['status']
+
+    assignments = [f'{key} = ?' for key in fields]
+    assignments.append('last_update_date = CURRENT_TIMESTAMP')
+    if status_changed:
+        assignments.append('last_status_change_date = CURRENT_TIMESTAMP')
+
+    conn.execute(
+        f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?",
+        (*fields.values(), task_id)
+    )
+
+    # Un changement de statut fait avancer le projet
+    if status_changed:
+        conn.execute(
+            'UPDATE projects SET last_progress_date = CURRENT_TIMESTAMP WHERE id = ?',
+            (fields.get('project_id', existing['project_id']),)
+        )
+
+    return True
+
+@app.route('/api/tasks/<int:task_id>', methods=['PATCH'])
+def update_task(task_id):
+    """PATCH /api/tasks/:id - Mettre à jour plusieurs champs en une seule transaction"""
+    try:
+        data = request.json or {}
+        
+        try:
+            found = run_write(update_task_fields, task_id, data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if not found:
+            return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
+        
+        return jsonify({'success': True})
+    except Exception as e:
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/title', methods=['PATCH'])
 def update_task_title(task_id):
@@ -381,17 +960,14 @@ def update_task_title(task_id):
         if len(title) == 0:
             return jsonify({'success': False, 'error': 'Le projet doit avoir un nom.'}), 400
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET title = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (title, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/description', methods=['PATCH'])
 def update_task_description(task_id):
@@ -400,36 +976,32 @@ def update_task_description(task_id):
         data = request.json
         description = data.get('description', '')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET description = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (description, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/deadline', methods=['PATCH'])
 def update_task_deadline(task_id):
     """PATCH /api/tasks/:id/deadline"""
     try:
         data = request.json
-        deadline = data.get('deadline')
+        deadline = normalize_deadline(data.get('deadline'))
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET deadline = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (deadline, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/status', methods=['PATCH'])
 def update_task_status(task_id):
@@ -438,19 +1010,16 @@ def update_task_status(task_id):
         data = request.json
         status = data.get('status')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             '''UPDATE tasks 
             SET status = ?, last_update_date = CURRENT_TIMESTAMP, last_status_change_date = CURRENT_TIMESTAMP 
             WHERE id = ?''',
             (status, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/priority', methods=['PATCH'])
 def update_task_priority(task_id):
@@ -459,17 +1028,14 @@ def update_task_priority(task_id):
         data = request.json
         priority = data.get('priority')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET priority = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (priority, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/load', methods=['PATCH'])
 def update_task_load(task_id):
@@ -478,17 +1044,14 @@ def update_task_load(task_id):
         data = request.json
         load = data.get('load')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET load = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (load, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/responsible', methods=['PATCH'])
 def update_task_responsible(task_id):
@@ -497,17 +1060,14 @@ def update_task_responsible(task_id):
         data = request.json
         responsible = data.get('responsible')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET responsible = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (responsible, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/project', methods=['PATCH'])
 def update_task_project(task_id):
@@ -516,17 +1076,14 @@ def update_task_project(task_id):
         data = request.json
         project_id = data.get('project_id')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET project_id = ?, last_update_date = CURRENT_TIMESTAMP WHERE id = ?',
             (project_id, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/last-update', methods=['PATCH'])
 def update_task_last_update(task_id):
@@ -535,17 +1092,14 @@ def update_task_last_update(task_id):
         data = request.json
         last_update_date = data.get('last_update_date')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET last_update_date = ? WHERE id = ?',
             (last_update_date, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>/last-status-change', methods=['PATCH'])
 def update_task_last_status_change(task_id):
@@ -554,34 +1108,27 @@ def update_task_last_status_change(task_id):
         data = request.json
         last_status_change_date = data.get('last_status_change_date')
         
-        conn = get_db()
-        conn.execute(
+        execute_write(
             'UPDATE tasks SET last_status_change_date = ? WHERE id = ?',
             (last_status_change_date, task_id)
         )
-        conn.commit()
-        conn.close()
         
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """DELETE /api/tasks/:id - Supprimer une tâche"""
     try:
-        conn = get_db()
-        result = conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-        conn.commit()
+        deleted = execute_write('DELETE FROM tasks WHERE id = ?', (task_id,))
         
-        if result.rowcount == 0:
-            conn.close()
+        if deleted == 0:
             return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
         
-        conn.close()
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks', methods=['DELETE'])
 def delete_tasks():
@@ -589,23 +1136,943 @@ def delete_tasks():
     try:
         project_id = request.args.get('project_id')
         
-        conn = get_db()
-        
         if project_id:
-            result = conn.execute('DELETE FROM tasks WHERE project_id = ?', (project_id,))
+            deleted = execute_write('DELETE FROM tasks WHERE project_id = ?', (project_id,))
         else:
-            result = conn.execute('DELETE FROM tasks')
-        
-        conn.commit()
+            deleted = execute_write('DELETE FROM tasks')
         
-        if result.rowcount == 0 and not project_id:
-            conn.close()
+        if deleted == 0 and not project_id:
             return jsonify({'success': False, 'error': 'Réinitialisation échouée'}), 400
         
-        conn.close()
         return jsonify({'success': True})
+    except Exception as e:
+        return error_response(e)
+
+# ==================== RECHERCHE ====================
+
+# Nombre de résultats par défaut / maximum de GET /api/search
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Marqueurs posés par snippet() puis convertis en <mark> après échappement HTML
+SNIPPET_START = '\ue000'
+SNIPPET_END = '\ue001'
+
+def fts_query(text):
+    """Requête FTS5 à partir de la saisie : chaque mot est un préfixe et tous doivent être présents.
+    Les mots sont cités : la syntaxe FTS5 (AND, NEAR, ":"...) saisie par l'utilisateur reste du texte."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def snippet_html(text):
+    """Extrait échappé pour l'HTML, termes trouvés entourés de <mark>"""
+    if text is None:
+        return None
+    return html.escape(text).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+@app.route('/api/search', methods=['GET'])
+@etag_cached('tasks', 'projects')
+def search_tasks():
+    """GET /api/search?q=texte - Recherche plein texte dans les titres et descriptions des tâches
+
+    Résultats classés par pertinence (BM25), chaque mot est cherché en préfixe.
+    Filtres optionnels identiques à GET /api/tasks (project_id, status, priority...) et limit.
+    Chaque tâche porte project_name et un objet 'snippets' { title, description } en HTML.
+    """
+    try:
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({'success': False, 'error': 'Paramètre q requis'}), 400
+        
+        try:
+            limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit doit être un entier'}), 400
+        if not 1 <= limit <= SEARCH_MAX_LIMIT:
+            return jsonify({'success': False, 'error': f'limit doit être compris entre 1 et {SEARCH_MAX_LIMIT}'}), 400
+        
+        try:
+            where, params = build_task_filters()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        where.insert(0, 'tasks_fts MATCH ?')
+        params.insert(0, fts_query(q))
+        
+        # CROSS JOIN : l'index FTS est toujours parcouru en premier, les filtres
+        # s'appliquent ensuite (sinon SQLite peut partir de l'index projet et tester MATCH ligne à ligne)
+        sql = f'''
+            SELECT t.*, p.name AS project_name,
+                snippet(tasks_fts, 0, ?, ?, '…', 12) AS snippet_title,
+                snippet(tasks_fts, 1, ?, ?, '…', 24) AS snippet_description
+            FROM tasks_fts
+            CROSS JOIN tasks t ON t.id = tasks_fts.rowid
+            LEFT JOIN projects p ON p.id = t.project_id
+            WHERE {' AND '.join(where)}
+            ORDER BY tasks_fts.rank
+            LIMIT ?
+        '''
+        markers = [SNIPPET_START, SNIPPET_END] * 2
+        
+        conn = get_db()
+        rows = conn.execute(sql, markers + params + [limit]).fetchall()
+        
+        results = []
+        for row in rows:
+            task = {key: row[key] for key in row.keys() if not key.startswith('snippet_')}
+            task['snippets'] = {
+                'title': snippet_html(row['snippet_title']),
+                'description': snippet_html(row['snippet_description'])
+            }
+            results.append(task)
+        
+        return jsonify({'success': True, 'data': results})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== DASHBOARD ====================
+
+@app.route('/api/dashboard', methods=['GET'])
+@etag_cached('tasks', 'projects', time_sensitive=True)
+def get_dashboard():
+    """GET /api/dashboard?days=N - Données de la page d'accueil en une seule requête
+
+    Tâches à échéance proche, tâches prioritaires ouvertes, compteurs par statut,
+    nombre de tâches en retard et liste des projets (id, nom), lus dans une même
+    transaction de lecture pour garantir un instantané cohérent.
+    """
+    try:
+        days = request.args.get('days', DUE_SOON_DEFAULT_DAYS, type=int)
+        if not 0 <= days <= DUE_SOON_MAX_DAYS:
+            return jsonify({'success': False, 'error': f'days doit être compris entre 0 et {DUE_SOON_MAX_DAYS}'}), 400
+        
+        conn = get_db()
+        conn.execute('BEGIN')
+        try:
+            due_soon = conn.execute("""
+                SELECT * FROM tasks
+                WHERE deadline < datetime('now', ?)
+                AND status != 'done'
+                ORDER BY deadline ASC
+            """, (f'+{days} days',)).fetchall()
+            
+            high_priority = conn.execute(
+                "SELECT * FROM tasks WHERE priority = 'high' AND status != 'done'"
+            ).fetchall()
+            
+            counts = conn.execute('''
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(status = 'todo'), 0) AS todo,
+                    COALESCE(SUM(status = 'in-progress'), 0) AS in_progress,
+                    COALESCE(SUM(status = 'done'), 0) AS done
+                FROM tasks
+            ''').fetchone()
+            
+            overdue = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE deadline < datetime('now') AND status != 'done'"
+            ).fetchone()[0]
+            
+            projects = conn.execute('SELECT id, name FROM projects ORDER BY creation_date DESC').fetchall()
+        finally:
+            conn.commit()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'due_soon': [dict(task) for task in due_soon],
+                'high_priority': [dict(task) for task in high_priority],
+                'counts': dict(counts),
+                'overdue': overdue,
+                'projects': [dict(project) for project in projects]
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== SYNCHRONISATION ====================
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """GET /api/changes?since=N - Tâches et projets modifiés ou supprimés depuis la révision N
+
+    Réponse : { revision, tasks, projects, deleted: { tasks: [ids], projects: [ids] } }
+    Le client conserve "revision" et la renvoie comme "since" à l'appel suivant (0 = tout).
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        if since < 0:
+            return jsonify({'success': False, 'error': 'since doit être positif'}), 400
+        
+        conn = get_db()
+        # Instantané cohérent entre la révision renvoyée et les lignes lues
+        conn.execute('BEGIN')
+        try:
+            revision = conn.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+            
+            # +entity : la plage de révisions (clé primaire) guide la requête, pas l'index
+            # (entity, entity_id) qui lirait tout le journal de l'entité puis le trierait
+            changed = {}
+            for entity in ('tasks', 'projects'):
+                rows = conn.execute(f'''
+                    SELECT e.* FROM change_log c
+                    JOIN {entity} e ON e.id = c.entity_id
+                    WHERE c.revision > ? AND c.revision <= ? AND +c.entity = ? AND c.op = 'upsert'
+                    ORDER BY c.revision
+                ''', (since, revision, entity)).fetchall()
+                changed[entity] = [dict(row) for row in rows]
+            
+            deleted = {}
+            for entity in ('tasks', 'projects'):
+                rows = conn.execute('''
+                    SELECT entity_id FROM change_log
+                    WHERE revision > ? AND revision <= ? AND +entity = ? AND op = 'delete'
+                    ORDER BY revision
+                ''', (since, revision, entity)).fetchall()
+                deleted[entity] = [row['entity_id'] for row in rows]
+        finally:
+            conn.commit()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'revision': revision,
+                'tasks': changed['tasks'],
+                'projects': changed['projects'],
+                'deleted': deleted
+            }
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ==================== ÉVÉNEMENTS (SSE) ====================
+
+# Intervalle des commentaires keep-alive du flux SSE (secondes)
+SSE_HEARTBEAT_SECONDS = 15
+# Flux SSE simultanés (0 = illimité) : chaque flux occupe un thread du serveur
+app.config.setdefault('SSE_MAX_STREAMS', int(os.environ.get('OPAC_SSE_MAX_STREAMS', 0)))
+# Délai de reconnexion suggéré au navigateur (millisecondes)
+SSE_RETRY_MS = 3000
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """GET /api/events - Flux Server-Sent Events des modifications de tâches et projets
+
+    Chaque événement "change" porte { revision, entity, id, op } et a pour id la révision.
+    Reprise après coupure via l'en-tête Last-Event-ID (ou ?last_event_id=N) ;
+    un événement "resync" demande au client de tout recharger.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Last-Event-ID invalide'}), 400
+    
+    max_streams = app.config['SSE_MAX_STREAMS']
+    if max_streams and event_bus.subscriber_count() >= max_streams:
+        # Les threads restent disponibles pour les requêtes courtes
+        response = jsonify({'success': False, 'error': 'Trop de flux d\'événements ouverts'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    # Abonnement avant la lecture de l'historique : aucun événement perdu entre les deux
+    subscription = event_bus.subscribe()
+    
+    def generate():
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            sent = last_id or 0
+            
+            if last_id is not None:
+                # Connexion du pool rendue aussitôt : le flux peut durer des heures
+                conn = db_pool.acquire()
+                try:
+                    rows, resync_revision = read_changes(conn, last_id)
+                finally:
+                    db_pool.release(conn)
+                
+                if resync_revision is not None:
+                    yield format_sse(resync_revision, 'resync', {'revision': resync_revision})
+                    sent = resync_revision
+                for row in rows:
+                    yield format_sse(row['revision'], 'change', change_payload(row))
+                    sent = row['revision']
+            
+            while True:
+                event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    break
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                event_id, event_type, data = event
+                if event_id <= sent:
+                    continue  # déjà envoyé lors de la reprise
+                sent = event_id
+                yield format_sse(event_id, event_type, data)
+            
+            # File saturée ou arrêt du serveur : fin du flux, le navigateur se reconnecte avec Last-Event-ID
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# ==================== BATCH ====================
+
+# Nombre maximal d'opérations par appel à /api/batch
+MAX_BATCH_OPERATIONS = 1000
+
+# Colonnes modifiables d'un projet dans un batch
+PROJECT_UPDATABLE_FIELDS = ('name', 'description')
+
+def update_project_fields(conn, project_id, data):
+    """Appliquer un sous-ensemble de colonnes à un projet (sans commit).
+    Retourne False si le projet n'existe pas, lève ValueError si les données sont invalides."""
+    unknown = [key for key in data if key not in PROJECT_UPDATABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Champ(s) non modifiable(s) : {', '.join(unknown)}")
+
+    fields = {key: data[key] for key in PROJECT_UPDATABLE_FIELDS if key in data}
+    if not fields:
+        raise ValueError('Aucun champ à mettre à jour.')
+    if 'name' in fields and not fields['name']:
+        raise ValueError('Le projet doit avoir un nom.')
+
+    assignments = [f'{key} = ?' for key in fields]
+    assignments.append('last_update_date = CURRENT_TIMESTAMP')
+    result = conn.execute(
+        f"UPDATE projects SET {', '.join(assignments)} WHERE id = ?",
+        (*fields.values(), project_id)
+    )
+    return result.rowcount > 0
+
+def run_batch_operation(conn, operation):
+    """Exécuter une opération de batch, retourne le résultat (dict) ou lève ValueError / LookupError"""
+    op = operation.get('op')
+    resource = operation.get('resource')
+    item_id = operation.get('id')
+    data = operation.get('data') or {}
+
+    if not isinstance(data, dict):
+        raise ValueError('Données invalides')
+    if resource not in ('tasks', 'projects'):
+        raise ValueError(f'Ressource inconnue : {resource}')
+
+    if op == 'create':
+        if resource == 'tasks':
+            if not data.get('title'):
+                raise ValueError('La tâche doit avoir un titre.')
+            return {'id': insert_task(conn, data)}
+        if not data.get('name'):
+            raise ValueError('Le projet doit avoir un nom.')
+        return {'id': insert_project(conn, data)}
+
+    if not isinstance(item_id, int):
+        raise ValueError("L'opération doit préciser un id entier")
+
+    if op == 'update':
+        if resource == 'tasks':
+            found = update_task_fields(conn, item_id, data)
+        else:
+            found = update_project_fields(conn, item_id, data)
+    elif op == 'delete':
+        found = conn.execute(f'DELETE FROM {resource} WHERE id = ?', (item_id,)).rowcount > 0
+    else:
+        raise ValueError(f'Opération inconnue : {op}')
+
+    if not found:
+        raise LookupError('Tâche introuvable' if resource == 'tasks' else 'Projet introuvable')
+    return {'id': item_id}
+
+class BatchOperationError(Exception):
+    """Opération de batch en échec : le batch entier est annulé"""
+
+    def __init__(self, index, results, cause):
+        super().__init__(f'Opération {index} en échec, batch annulé : {cause}')
+        self.index = index
+        self.results = results
+        self.cause = cause
+
+def run_batch_operations(conn, operations):
+    """Exécuter les opérations dans l'ordre (sans commit), lève BatchOperationError à la première en échec"""
+    results = []
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise ValueError('Opération invalide')
+            results.append({'success': True, 'data': run_batch_operation(conn, operation)})
+        except (ValueError, LookupError, sqlite3.IntegrityError) as e:
+            results.append({'success': False, 'error': str(e)})
+            raise BatchOperationError(index, results, e)
+    return results
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """POST /api/batch - Exécuter une liste ordonnée d'opérations dans une seule transaction
+
+    Corps : {"operations": [{"op": "create|update|delete", "resource": "tasks|projects",
+                             "id": 12, "data": {...}}, ...]}
+    Tout ou rien : la première opération en échec annule l'ensemble du batch.
+    """
+    try:
+        operations = (request.json or {}).get('operations')
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'error': 'Liste "operations" manquante ou vide'}), 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({'success': False, 'error': f'Maximum {MAX_BATCH_OPERATIONS} opérations par batch'}), 400
+        
+        try:
+            # Un seul SAVEPOINT sur le thread d'écriture : l'échec d'une opération annule tout le batch
+            results = run_write(run_batch_operations, operations)
+        except BatchOperationError as e:
+            status = 404 if isinstance(e.cause, LookupError) else 400
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'failed_index': e.index,
+                'results': e.results
+            }), status
+        
+        return jsonify({'success': True, 'data': results})
+    except Exception as e:
+        return error_response(e)
+
+# ==================== IMPORT ====================
+
+# Lignes insérées par transaction lors d'un import
+IMPORT_CHUNK_ROWS = 5000
+
+# Nombre maximal d'erreurs détaillées dans le rapport d'import
+MAX_IMPORT_ERRORS = 1000
+
+# creation_date optionnelle : un import de backlog conserve ses dates d'origine
+IMPORT_TASK_SQL = '''INSERT INTO tasks
+    (title, description, deadline, status, priority, load, responsible, project_id, creation_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))'''
+
+IMPORT_PROJECT_SQL = '''INSERT INTO projects (name, description, creation_date)
+    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))'''
+
+def read_import_rows(stream, fmt):
+    """Lire le corps d'un import ligne par ligne sans le charger en mémoire.
+    Génère (numéro de ligne, dict ou None, erreur ou None)."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, None, 'Trop de colonnes'
+            else:
+                yield reader.line_num, row, None
+        return
+    
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f'JSON invalide : {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Chaque ligne doit être un objet JSON'
+        else:
+            yield line_number, row, None
+
+def import_value(row, key):
+    """Valeur d'une colonne importée, None si absente ou vide (les cellules CSV vides comptent comme absentes)"""
+    value = row.get(key)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+class ProjectResolver:
+    """Correspondance des références de projet d'un import vers les ids (chargée une seule fois)"""
+
+    def __init__(self, conn, create_missing):
+        self.create_missing = create_missing
+        self.ids = set()
+        self.by_name = {}
+        self.created = 0
+        for row in conn.execute('SELECT id, name FROM projects ORDER BY id'):
+            self.ids.add(row['id'])
+            self.by_name.setdefault(row['name'], row['id'])
+
+    def add(self, project_id, name):
+        self.ids.add(project_id)
+        self.by_name.setdefault(name, project_id)
+
+    def resolve(self, row):
+        """Id du projet d'une ligne (colonne project_id ou project = nom), None si aucun"""
+        project_id = import_value(row, 'project_id')
+        if project_id is not None:
+            try:
+                project_id = int(project_id)
+            except (TypeError, ValueError):
+                raise ValueError(f'project_id invalide : {project_id!r}')
+            if project_id not in self.ids:
+                raise ValueError(f'Projet {project_id} introuvable')
+            return project_id
+        
+        name = import_value(row, 'project')
+        if name is None:
+            return None
+        name = str(name)
+        if name in self.by_name:
+            return self.by_name[name]
+        if not self.create_missing:
+            raise ValueError(f'Projet introuvable : {name}')
+        
+        project_id = run_write(insert_project, {'name': name})
+        self.add(project_id, name)
+        self.created += 1
+        return project_id
+
+def task_import_values(row, projects):
+    """Valider une ligne de tâche importée, retourne les paramètres de IMPORT_TASK_SQL (lève ValueError)"""
+    title = import_value(row, 'title')
+    if not title:
+        raise ValueError('La tâche doit avoir un titre.')
+    
+    status = import_value(row, 'status') or 'todo'
+    if status not in TASK_STATUSES:
+        raise ValueError(f'Statut invalide : {status!r}')
+    
+    load = import_value(row, 'load')
+    try:
+        load = float(load) if load is not None else 0.0
+    except (TypeError, ValueError):
+        raise ValueError(f'Charge invalide : {load!r}')
+    
+    deadline = normalize_deadline(import_value(row, 'deadline'))
+    creation_date = normalize_deadline(import_value(row, 'creation_date'))
+    
+    # En dernier : resolve() peut créer le projet, la ligne doit déjà être valide
+    project_id = projects.resolve(row)
+    
+    return (
+        str(title),
+        import_value(row, 'description') or '',
+        deadline,
+        status,
+        import_value(row, 'priority') or 'haute',
+        load,
+        import_value(row, 'responsible') or '',
+        project_id,
+        creation_date
+    )
+
+def project_import_values(row):
+    """Valider une ligne de projet importée, retourne les paramètres de IMPORT_PROJECT_SQL (lève ValueError)"""
+    name = import_value(row, 'name')
+    if not name:
+        raise ValueError('Le projet doit avoir un nom.')
+    return (
+        str(name),
+        import_value(row, 'description') or '',
+        normalize_deadline(import_value(row, 'creation_date'))
+    )
+
+@app.route('/api/import', methods=['POST'])
+def import_data():
+    """POST /api/import?resource=tasks|projects&format=ndjson|csv - Import en masse
+
+    Corps lu en flux : une ligne JSON par enregistrement (NDJSON) ou un CSV avec en-tête.
+    Tâches : title, description, deadline, status, priority, load, responsible, creation_date
+    et le projet par project_id ou par nom (project, créé s'il n'existe pas sauf ?create_projects=false).
+    Les lignes invalides sont ignorées et listées dans le rapport (numéro de ligne + erreur) ;
+    les lignes valides sont insérées par executemany, une transaction par paquet de IMPORT_CHUNK_ROWS.
+    """
+    resource = request.args.get('resource', 'tasks')
+    if resource not in ('tasks', 'projects'):
+        return jsonify({'success': False, 'error': f'Ressource inconnue : {resource}'}), 400
+    
+    fmt = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'success': False, 'error': f'Format inconnu : {fmt}'}), 400
+    
+    create_projects = request.args.get('create_projects', 'true').lower() not in ('0', 'false', 'no')
+    
+    conn = get_db()
+    inserted = 0
+    rejected = 0
+    errors = []
+    
+    def reject(line_number, error):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({'line': line_number, 'error': str(error)})
+    
+    try:
+        started = time.perf_counter()
+        sql = IMPORT_TASK_SQL if resource == 'tasks' else IMPORT_PROJECT_SQL
+        
+        def insert_chunk(write_conn, rows):
+            """Insérer un paquet validé (thread d'écriture, sans commit)"""
+            if resource == 'projects':
+                write_conn.executemany(sql, rows)
+                return
+            # Triggers d'insertion suspendus le temps du paquet, tables dérivées mises à jour en une passe
+            after_id = write_conn.execute('SELECT COALESCE(MAX(id), 0) FROM tasks').fetchone()[0]
+            write_conn.execute('INSERT INTO bulk_import (active) VALUES (1)')
+            write_conn.executemany(sql, rows)
+            sync_imported_tasks(write_conn, after_id)
+            write_conn.execute('DELETE FROM bulk_import')
+        
+        # Un paquet par passage sur le thread d'écriture : les autres modifications s'intercalent entre deux paquets
+        projects = ProjectResolver(conn, create_projects) if resource == 'tasks' else None
+        chunk = []
+        
+        for line_number, row, error in read_import_rows(request.stream, fmt):
+            if error is None:
+                try:
+                    if resource == 'tasks':
+                        chunk.append(task_import_values(row, projects))
+                    else:
+                        chunk.append(project_import_values(row))
+                except ValueError as e:
+                    error = e
+            if error is not None:
+                reject(line_number, error)
+                continue
+            
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                run_write(insert_chunk, chunk)
+                inserted += len(chunk)
+                chunk = []
+        
+        if chunk:
+            run_write(insert_chunk, chunk)
+        inserted += len(chunk)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'inserted': inserted,
+                'rejected': rejected,
+                'projects_created': projects.created if projects else 0,
+                'errors': errors,
+                'errors_truncated': rejected > len(errors),
+                'duration_ms': round((time.perf_counter() - started) * 1000)
+            }
+        })
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Les paquets déjà validés restent en base
+        return jsonify({'success': False, 'error': f'Corps illisible : {e}', 'inserted': inserted}), 400
+    except WriteQueueTimeout as e:
+        # Le paquet en cours n'a pas été écrit : reprendre l'import après les lignes insérées
+        response = jsonify({'success': False, 'error': str(e), 'inserted': inserted})
+        response.headers['Retry-After'] = str(WRITE_RETRY_AFTER_SECONDS)
+        return response, 503
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e), 'inserted': inserted}), 500
+
+# ==================== EXPORT ====================
+
+# Requêtes d'export (ordre stable ; project_name permet de réimporter les tâches par nom de projet)
+EXPORT_QUERIES = {
+    'projects': 'SELECT * FROM projects ORDER BY id',
+    'tasks': 'SELECT t.*, p.name AS project_name FROM tasks t LEFT JOIN projects p ON p.id = t.project_id ORDER BY t.id',
+}
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+# Compression à la volée : (niveau, type MIME, extension)
+EXPORT_COMPRESSIONS = {
+    'gzip': (6, 'application/gzip', 'gz'),
+    'zstd': (3, 'application/zstd', 'zst'),
+}
+
+def export_compressor(method):
+    """Compresseur incrémental (méthodes compress / flush), None sans compression"""
+    if method is None:
+        return None
+    level = EXPORT_COMPRESSIONS[method][0]
+    if method == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 : en-tête gzip
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+def export_chunks(conn, resources, fmt):
+    """Générer l'export par morceaux de STREAM_CHUNK_ROWS lignes, au fil des curseurs"""
+    for resource in resources:
+        cursor = conn.execute(EXPORT_QUERIES[resource])
+        columns = [column[0] for column in cursor.description]
+        
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+        
+        while True:
+            rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+            if not rows:
+                break
+            
+            if fmt == 'csv':
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            elif len(resources) > 1:
+                # Export complet : chaque ligne indique sa ressource
+                yield ''.join(
+                    json.dumps({'resource': resource, **dict(row)}, ensure_ascii=False) + '\n' for row in rows
+                )
+            else:
+                yield ''.join(json.dumps(dict(row), ensure_ascii=False) + '\n' for row in rows)
+
+def stream_export(resources, fmt, compression):
+    """Flux binaire de l'export, lu dans un seul instantané de la base.
+    Utilise sa propre connexion du pool : celle de g est rendue avant la fin du streaming."""
+    conn = db_pool.acquire()
+    try:
+        # Transaction de lecture : projets et tâches cohérents entre eux (instantané WAL)
+        conn.execute('BEGIN')
+        compressor = export_compressor(compression)
+        
+        for chunk in export_chunks(conn, resources, fmt):
+            data = chunk.encode('utf-8')
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db_pool.release(conn)
+
+@app.route('/api/export', methods=['GET'])
+def export_data():
+    """GET /api/export?format=ndjson|csv&compress=gzip|zstd&resource=all|projects|tasks - Export en flux
+
+    NDJSON (défaut) : projets puis tâches, une ligne JSON par enregistrement avec son champ "resource".
+    CSV : une seule ressource par fichier (tasks par défaut).
+    La mémoire utilisée ne dépend pas de la taille de la base ; le fichier est proposé en téléchargement.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f'Format inconnu : {fmt}'}), 400
+    
+    resource = request.args.get('resource') or ('all' if fmt == 'ndjson' else 'tasks')
+    if resource == 'all' and fmt == 'ndjson':
+        resources = ['projects', 'tasks']
+    elif resource in EXPORT_QUERIES:
+        resources = [resource]
+    else:
+        return jsonify({'success': False, 'error': f'Ressource invalide pour le format {fmt} : {resource}'}), 400
+    
+    compression = request.args.get('compress') or None
+    if compression is not None and compression not in EXPORT_COMPRESSIONS:
+        return jsonify({'success': False, 'error': f'Compression inconnue : {compression}'}), 400
+    if compression == 'zstd' and zstandard is None:
+        return jsonify({'success': False, 'error': 'Compression zstd indisponible (paquet zstandard non installé)'}), 400
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    if compression:
+        _, mimetype, suffix = EXPORT_COMPRESSIONS[compression]
+        extension = f'{extension}.{suffix}'
+    filename = f"opac-{resource}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    
+    return Response(stream_export(resources, fmt, compression), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+# ==================== SAUVEGARDES ====================
+
+@app.route('/api/admin/backup', methods=['POST'])
+def create_backup():
+    """POST /api/admin/backup?wait=true - Créer un instantané compressé de la base
+
+    Par défaut la sauvegarde tourne en arrière-plan (202) : la copie page par page
+    ne bloque ni les lectures ni les écritures. wait=true attend l'instantané (201).
+    """
+    try:
+        if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+            return jsonify({'success': True, 'data': backup_manager.snapshot()}), 201
+        
+        if not backup_manager.start_snapshot():
+            return jsonify({'success': False, 'error': 'Une sauvegarde ou restauration est déjà en cours'}), 409
+        return jsonify({'success': True, 'data': backup_manager.status()}), 202
+    except BackupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/backups', methods=['GET'])
+def list_backups():
+    """GET /api/admin/backups - Instantanés disponibles et état de la dernière sauvegarde"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': {
+                'snapshots': backup_manager.list_snapshots(),
+                'status': backup_manager.status()
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def resync_after_restore(conn, previous_ids, previous_revisions, previous_change):
+    """Après restauration, garder les compteurs croissants (ETag, /api/changes, SSE) :
+    toutes les lignes restaurées sont re-journalisées, les disparues notées supprimées."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'change_log'",
+            (previous_change,)
+        )
+        for entity in ('projects', 'tasks'):
+            current_ids = {row[0] for row in conn.execute(f'SELECT id FROM {entity}')}
+            conn.executemany(
+                "INSERT OR REPLACE INTO change_log (entity, entity_id, op) VALUES (?, ?, 'delete')",
+                [(entity, item_id) for item_id in sorted(previous_ids[entity] - current_ids)]
+            )
+            conn.execute(
+                f"INSERT OR REPLACE INTO change_log (entity, entity_id, op) SELECT ?, id, 'upsert' FROM {entity} ORDER BY id",
+                (entity,)
+            )
+        for name, revision in previous_revisions.items():
+            conn.execute(
+                'UPDATE data_revisions SET revision = MAX(revision, ?) + 1 WHERE name = ?',
+                (revision, name)
+            )
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def restore_snapshot(conn, name):
+    """Restaurer un instantané via la connexion d'écriture (tâche exclusive : aucune écriture intercalée)"""
+    previous_ids = {
+        entity: {row[0] for row in conn.execute(f'SELECT id FROM {entity}')}
+        for entity in ('projects', 'tasks')
+    }
+    previous_revisions = {
+        row['name']: row['revision'] for row in conn.execute('SELECT name, revision FROM data_revisions')
+    }
+    previous_change = conn.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+    
+    backup_manager.restore(name, conn)
+    
+    # L'instantané peut dater d'un schéma plus ancien
+    run_migrations(conn)
+    resync_after_restore(conn, previous_ids, previous_revisions, previous_change)
+
+@app.route('/api/admin/restore', methods=['POST'])
+def restore_backup():
+    """POST /api/admin/restore - Restaurer un instantané : {"snapshot": "opac-....db.zst"}
+
+    Un instantané de l'état courant ("pre-restore") est pris avant la restauration.
+    Les pages ouvertes reçoivent un événement "resync".
+    """
+    try:
+        name = (request.json or {}).get('snapshot')
+        if not name:
+            return jsonify({'success': False, 'error': 'Instantané à restaurer manquant'}), 400
+        if name not in {snapshot['name'] for snapshot in backup_manager.list_snapshots()}:
+            return jsonify({'success': False, 'error': f'Instantané introuvable : {name}'}), 404
+        
+        # Sans rotation : l'instantané à restaurer peut être le plus ancien conservé
+        safety = backup_manager.snapshot(label='pre-restore', rotate=False)
+        # Sans limite d'attente : la restauration d'une grosse base continue de toute façon
+        write_queue.execute(restore_snapshot, name, exclusive=True, timeout=None)
+        backup_manager.rotate()
+        
+        return jsonify({'success': True, 'data': {'restored': name, 'pre_restore_snapshot': safety['name']}})
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except BackupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return error_response(e)
+
+# ==================== MESURES ====================
+
+@app.route('/api/admin/metrics', methods=['GET'])
+def get_metrics():
+    """GET /api/admin/metrics - Mesures des requêtes au format texte Prometheus
+
+    Par route : nombre de requêtes par statut, histogramme des durées, p50 / p95 / p99
+    des dernières requêtes, temps SQLite, lignes lues, attente de la file d'écriture
+    et sérialisation JSON ; plus l'état du pool, de la file d'écriture et des flux SSE.
+    """
+    if request_metrics is None:
+        return jsonify({'success': False, 'error': 'Mesures désactivées (OPAC_METRICS=0)'}), 404
+    
+    pool = db_pool.stats()
+    writer = write_queue.stats()
+    gauges = [
+        ('opac_db_pool_open_connections', 'Connexions ouvertes du pool', pool['open']),
+        ('opac_db_pool_idle_connections', 'Connexions inactives du pool', pool['idle']),
+        ('opac_write_queue_pending', "Modifications en attente dans la file d'écriture", writer['pending']),
+        ('opac_write_average_batch', 'Modifications par commit groupé (moyenne)', writer['average_batch']),
+        ('opac_sse_streams', 'Flux SSE ouverts', event_bus.subscriber_count()),
+    ]
+    return Response(request_metrics.prometheus(gauges), content_type=PROMETHEUS_CONTENT_TYPE)
+
+# Tris de GET /api/admin/queries
+QUERY_SORTS = ('total', 'max', 'count', 'mean')
+
+@app.route('/api/admin/queries', methods=['GET'])
+def get_queries():
+    """GET /api/admin/queries?limit=20&sort=total - Requêtes SQL les plus coûteuses
+
+    Requêtes normalisées (littéraux remplacés par ?) triées par temps cumulé, temps maximal,
+    nombre d'exécutions ou temps moyen, avec le plan des requêtes lentes (full_scan et
+    temp_b_tree signalent un index manquant) et les dernières requêtes lentes.
+    """
+    if query_log is None:
+        return jsonify({'success': False, 'error': 'Journal des requêtes désactivé (OPAC_QUERY_LOG=0)'}), 404
+    
+    limit = request.args.get('limit', 20, type=int)
+    sort = request.args.get('sort', 'total')
+    if sort not in QUERY_SORTS:
+        return jsonify({'success': False, 'error': f"Tri inconnu : {sort} (attendu : {', '.join(QUERY_SORTS)})"}), 400
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            **query_log.status(),
+            'queries': query_log.top(max(1, limit), sort),
+            'recent_slow': query_log.recent_slow()
+        }
+    })
+
+@app.route('/api/admin/queries', methods=['DELETE'])
+def reset_queries():
+    """DELETE /api/admin/queries - Remettre à zéro le classement et les requêtes lentes"""
+    if query_log is None:
+        return jsonify({'success': False, 'error': 'Journal des requêtes désactivé (OPAC_QUERY_LOG=0)'}), 404
+    query_log.reset()
+    return jsonify({'success': True})
+
+def serve_production():
+    """Servir l'application en production (waitress, cf. serve.py)"""
+    settings = server_settings()
+    # Une connexion SQLite par thread de traitement
+    db_pool.resize(max(db_pool.size, settings['threads']))
+    if not app.config['SSE_MAX_STREAMS']:
+        app.config['SSE_MAX_STREAMS'] = max(1, settings['threads'] // 2)
+    
+    backup_manager.start_scheduler()
+    serve(app, settings, on_shutdown=event_bus.close_all)
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    if os.environ.get('OPAC_DEBUG') == '1':
+        # Serveur de développement Werkzeug (débogueur + rechargement automatique)
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            backup_manager.start_scheduler()
+        app.run(debug=True, port=int(os.environ.get('OPAC_PORT', 5000)))
+    else:
+        serve_production()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Sauvegardes à chaud de la base OPAC
+Copie page par page via l'API de backup SQLite (sqlite3.Connection.backup) sans bloquer
+les écritures, puis compression zstd (gzip à défaut) et rotation des instantanés.
+"""
+
+import os
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Dépendance optionnelle : sans zstandard, les instantanés sont compressés en gzip
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Pages copiées par étape (~4 Mo avec des pages de 4 Kio) et pause entre deux étapes
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+
+SNAPSHOT_PREFIX = 'opac-'
+SNAPSHOT_EXTENSIONS = {'zstd': '.db.zst', 'gzip': '.db.gz'}
+
+
+class BackupError(Exception):
+    """Sauvegarde ou restauration impossible (déjà en cours, instantané introuvable...)"""
+
+
+def copy_database(source, target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+    """Copier source dans target par étapes, retourne le nombre de pages copiées.
+    La transaction de lecture tenue sur source fige l'instantané : les écritures des autres
+    connexions continuent (WAL) sans faire redémarrer la copie à chaque commit."""
+    total = [0]
+
+    def progress(status, remaining, page_count):
+        total[0] = page_count
+
+    source.execute('BEGIN')
+    try:
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        source.backup(target, pages=pages, sleep=sleep, progress=progress)
+    finally:
+        source.rollback()
+    return total[0]
+
+
+def compress_file(path, destination, method):
+    """Compresser un fichier en flux (mémoire constante)"""
+    with open(path, 'rb') as src:
+        if method == 'zstd':
+            with open(destination, 'wb') as dst:
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+        else:
+            with gzip.open(destination, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+
+
+def decompress_file(path, destination):
+    """Décompresser un instantané selon son extension"""
+    if path.endswith(SNAPSHOT_EXTENSIONS['zstd']):
+        if zstandard is None:
+            raise BackupError('Instantané zstd illisible : paquet zstandard non installé')
+        with open(path, 'rb') as src, open(destination, 'wb') as dst:
+            zstandard.ZstdDecompressor().copy_stream(src, dst)
+    else:
+        with gzip.open(path, 'rb') as src, open(destination, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+
+
+class BackupManager:
+    """Instantanés compressés de la base, rotation et planification"""
+
+    def __init__(self, db_path, backup_dir, keep=10, interval=0, compression=None):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = max(1, int(keep))
+        self.interval = interval
+        self.compression = compression or ('zstd' if zstandard else 'gzip')
+        if self.compression == 'zstd' and zstandard is None:
+            raise ValueError('Compression zstd indisponible (paquet zstandard non installé)')
+
+        # Une seule sauvegarde / restauration à la fois
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._scheduler = None
+        self.last_result = None
+        self.last_error = None
+
+    # ==================== INSTANTANÉS ====================
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def snapshot(self, label=None, rotate=True):
+        """Créer un instantané compressé (bloquant), retourne sa description.
+        rotate=False : garder tous les instantanés (avant une restauration, l'instantané
+        à restaurer peut être le plus ancien)."""
+        if not self._lock.acquire(blocking=False):
+            raise BackupError('Une sauvegarde ou restauration est déjà en cours')
+        try:
+            return self._snapshot(label, rotate)
+        finally:
+            self._lock.release()
+
+    def start_snapshot(self, label=None):
+        """Lancer un instantané dans un thread, retourne False si une opération est déjà en cours"""
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._snapshot(label)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Erreur sauvegarde: {e}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=run, name='opac-backup', daemon=True).start()
+        return True
+
+    def _snapshot(self, label, rotate=True):
+        started = time.perf_counter()
+        os.makedirs(self.backup_dir, exist_ok=True)
+
+        name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        if label:
+            name += f'-{label}'
+        name += SNAPSHOT_EXTENSIONS[self.compression]
+        path = os.path.join(self.backup_dir, name)
+        tmp_path = path + '.tmp'
+
+        try:
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(tmp_path)
+            try:
+                pages = copy_database(source, target)
+            finally:
+                target.close()
+                source.close()
+
+            compress_file(tmp_path, path + '.part', self.compression)
+            # Renommage atomique : un instantané listé est toujours complet
+            os.replace(path + '.part', path)
+        finally:
+            for leftover in (tmp_path, path + '.part'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        if rotate:
+            self.rotate()
+        self.last_result = {
+            'name': name,
+            'size': os.path.getsize(path),
+            'pages': pages,
+            'duration_ms': round((time.perf_counter() - started) * 1000),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.last_error = None
+        print(f"💾 Sauvegarde créée: {name} ({self.last_result['size'] / 1024:.0f} Ko)")
+        return self.last_result
+
+    def list_snapshots(self):
+        """Instantanés disponibles, du plus récent au plus ancien"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        snapshots = []
+        for name in os.listdir(self.backup_dir):
+            if name.startswith(SNAPSHOT_PREFIX) and name.endswith(tuple(SNAPSHOT_EXTENSIONS.values())):
+                stat = os.stat(os.path.join(self.backup_dir, name))
+                snapshots.append({
+                    'name': name,
+                    'size': stat.st_size,
+                    'created': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+                })
+        # Le nom commence par l'horodatage : ordre alphabétique = ordre chronologique
+        return sorted(snapshots, key=lambda snapshot: snapshot['name'], reverse=True)
+
+    def rotate(self):
+        """Supprimer les instantanés au-delà des `keep` plus récents"""
+        for snapshot in self.list_snapshots()[self.keep:]:
+            os.remove(os.path.join(self.backup_dir, snapshot['name']))
+
+    # ==================== RESTAURATION ====================
+
+    def restore(self, name, conn):
+        """Remplacer le contenu de la base par un instantané, via la connexion conn.
+        La copie se fait en une seule étape sous verrou d'écriture : les autres connexions
+        voient l'ancienne base puis la nouvelle, jamais un état intermédiaire."""
+        if name not in {snapshot['name'] for snapshot in self.list_snapshots()}:
+            raise LookupError(f'Instantané introuvable : {name}')
+        if not self._lock.acquire(blocking=False):
+            raise BackupError('Une sauvegarde ou restauration est déjà en cours')
+
+        tmp_path = os.path.join(self.backup_dir, name + '.restore')
+        try:
+            decompress_file(os.path.join(self.backup_dir, name), tmp_path)
+            source = sqlite3.connect(tmp_path)
+            try:
+                if source.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                    raise BackupError(f'Instantané corrompu : {name}')
+                source.backup(conn)
+            finally:
+                source.close()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self._lock.release()
+
+    # ==================== PLANIFICATION ====================
+
+    def start_scheduler(self):
+        """Instantané toutes les `interval` secondes dans un thread (0 = désactivé)"""
+        if not self.interval or self._scheduler is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                self.start_snapshot()
+
+        self._scheduler = threading.Thread(target=loop, name='opac-backup-scheduler', daemon=True)
+        self._scheduler.start()
+        print(f"💾 Sauvegardes planifiées toutes les {self.interval}s dans {self.backup_dir}")
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        """Informations exposées par /api/admin/backups"""
+        return {
+            'running': self.running,
+            'compression': self.compression,
+            'keep': self.keep,
+            'interval': self.interval,
+            'last': self.last_result,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,94 @@
+"""
+Compression des réponses HTTP d'OPAC
+gzip ou zstd selon l'en-tête Accept-Encoding du client, appliquée après chaque requête
+aux réponses textuelles assez volumineuses (listes de tâches, projets...).
+"""
+
+import gzip
+from flask import request
+
+# Dépendance optionnelle : sans zstandard, seul gzip est proposé
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Types de contenu compressés (les images, archives et flux sont laissés tels quels)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain',
+    'text/csv',
+}
+
+
+class ResponseCompressor:
+    """Compression négociée des réponses Flask (enregistrée comme hook after_request)"""
+
+    def __init__(self, min_size=1024, gzip_level=6, zstd_level=3):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    def init_app(self, app):
+        """Lire la configuration de l'application et enregistrer le hook"""
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.zstd_level = app.config.get('COMPRESS_ZSTD_LEVEL', self.zstd_level)
+        app.after_request(self.compress_response)
+
+    def encodings(self):
+        """Encodages proposés, par ordre de préférence à qualité égale"""
+        return ('zstd', 'gzip') if zstandard else ('gzip',)
+
+    def choose_encoding(self, accept_encodings):
+        """Meilleur encodage accepté par le client, None s'il n'en accepte aucun"""
+        best, best_quality = None, 0
+        for encoding in self.encodings():
+            quality = accept_encodings.quality(encoding)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(data)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def compress_response(self, response):
+        """Hook after_request : compresser la réponse si le client l'accepte et qu'elle en vaut la peine"""
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300
+        ):
+            return response
+
+        # La représentation dépend d'Accept-Encoding, même quand elle n'est pas compressée
+        response.vary.add('Accept-Encoding')
+
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        # ETag faible : même contenu, octets différents selon l'encodage
+        # (les ETag d'etag_cached sont déjà faibles, y compris sur les 304)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,147 @@
+"""
+Pool de connexions SQLite pour OPAC
+Garde des connexions "chaudes" réutilisées entre les requêtes
+au lieu d'ouvrir / fermer une connexion à chaque appel de get_db()
+"""
+
+import sqlite3
+import threading
+import time
+import queue
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Aucune connexion disponible dans le délai imparti"""
+
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite partagées entre les threads du serveur"""
+
+    def __init__(self, db_path, size=5, timeout=10.0, health_check_interval=30.0, setup=None, factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.setup = setup
+        # Classe des connexions créées (sous-classe de sqlite3.Connection, cf. metrics.TimedConnection)
+        self.factory = factory
+
+        # LIFO : la dernière connexion rendue est la plus "chaude" (cache de pages)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._last_used = {}
+        self._closed = False
+
+    # ==================== CYCLE DE VIE ====================
+
+    def _connect(self):
+        """Ouvrir une nouvelle connexion et appliquer la configuration initiale"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        # Activer les clés étrangères (une seule fois par connexion)
+        conn.execute('PRAGMA foreign_keys = ON')
+        if self.setup:
+            self.setup(conn)
+        return conn
+
+    def _discard(self, conn):
+        """Fermer une connexion et libérer sa place dans le pool"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._last_used.pop(id(conn), None)
+
+    def _is_healthy(self, conn):
+        """Vérifier une connexion restée inactive trop longtemps"""
+        last_used = self._last_used.get(id(conn), 0)
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Emprunter une connexion (en créer une si le pool n'est pas plein)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError('Pool de connexions fermé')
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+
+            if conn is not None:
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+                continue
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolTimeoutError(f'Aucune connexion disponible après {self.timeout}s')
+            try:
+                conn = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                raise PoolTimeoutError(f'Aucune connexion disponible après {self.timeout}s')
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        """Rendre une connexion au pool (annule toute transaction restée ouverte)"""
+        if self._closed:
+            self._discard(conn)
+            return
+        if self._created > self.size:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    def resize(self, size):
+        """Changer la taille maximale du pool (les connexions en trop sont fermées à leur retour)"""
+        self.size = max(1, int(size))
+
+    def close_all(self):
+        """Fermer toutes les connexions inactives (arrêt du serveur)"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        """Informations exposées par /api/health"""
+        return {
+            'size': self.size,
+            'open': self._created,
+            'idle': self._idle.qsize(),
+        }
@@ -0,0 +1,139 @@
+"""
+Bus d'événements OPAC (publish / subscribe en mémoire) et flux Server-Sent Events
+Les modifications sont lues dans change_log (cf. migration 5) après chaque requête
+d'écriture puis diffusées aux pages ouvertes via GET /api/events.
+"""
+
+import json
+import queue
+import threading
+
+# Événements en attente par abonné avant qu'il soit considéré comme décroché
+SUBSCRIBER_BUFFER_SIZE = 256
+
+# Au-delà, une seule notification "resync" remplace le détail des modifications
+MAX_EVENTS_PER_PUBLISH = 500
+
+
+class Subscription:
+    """File d'événements bornée d'un client SSE"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        # Le client n'a pas suivi : il doit se reconnecter (reprise via Last-Event-ID)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Prochain événement (event_id, event_type, data) ou None après timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """Terminer le flux (arrêt du serveur) : le client se reconnectera avec Last-Event-ID"""
+        self.overflowed = True
+        try:
+            self.queue.put_nowait(None)  # réveille le flux en attente
+        except queue.Full:
+            pass
+
+
+class EventBus:
+    """Diffusion en mémoire des événements vers tous les abonnés du processus"""
+
+    def __init__(self, buffer_size=SUBSCRIBER_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def close_all(self):
+        """Terminer tous les flux en cours (arrêt du serveur)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.close()
+
+    def publish(self, event_id, event_type, data):
+        """Envoyer un événement à tous les abonnés sans jamais bloquer l'émetteur"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait((event_id, event_type, data))
+            except queue.Full:
+                subscription.overflowed = True
+
+
+class ChangeLogPublisher:
+    """Publie sur le bus les entrées de change_log pas encore diffusées"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.revision = None
+        self._lock = threading.Lock()
+
+    def publish_pending(self, conn):
+        """À appeler après un commit : diffuse les révisions postérieures à la dernière publiée"""
+        with self._lock:
+            if self.revision is None:
+                # Premier appel (démarrage) : on part de l'état courant
+                self.revision = current_revision(conn)
+                return
+
+            rows, resync_revision = read_changes(conn, self.revision)
+            if resync_revision is not None:
+                self.bus.publish(resync_revision, 'resync', {'revision': resync_revision})
+                self.revision = resync_revision
+                return
+
+            for row in rows:
+                self.bus.publish(row['revision'], 'change', change_payload(row))
+            if rows:
+                self.revision = rows[-1]['revision']
+
+
+def current_revision(conn):
+    """Dernière révision de change_log"""
+    return conn.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+
+
+def read_changes(conn, since):
+    """Entrées de change_log postérieures à since.
+    Retourne (lignes, None), ou ([], révision courante) s'il y en a trop : le client doit tout recharger."""
+    rows = conn.execute(
+        'SELECT revision, entity, entity_id, op FROM change_log WHERE revision > ? ORDER BY revision LIMIT ?',
+        (since, MAX_EVENTS_PER_PUBLISH + 1)
+    ).fetchall()
+    if len(rows) > MAX_EVENTS_PER_PUBLISH:
+        return [], current_revision(conn)
+    return rows, None
+
+
+def change_payload(row):
+    """Contenu JSON d'un événement "change" à partir d'une ligne de change_log"""
+    return {
+        'revision': row['revision'],
+        'entity': row['entity'],
+        'id': row['entity_id'],
+        'op': row['op'],
+    }
+
+
+def format_sse(event_id, event_type, data):
+    """Sérialiser un événement au format text/event-stream"""
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
@@ -5,18 +5,77 @@ Crée la base et les tables si elles n'existent pas
 
 import sqlite3
 import os
+import sys
+from migrations import run_migrations, rebuild_project_stats
 
 # Chemin vers la base de données
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'tasks.db')
 
-def init_database():
+# Profils de performance SQLite (sélection via OPAC_DB_PROFILE)
+# - safe : WAL mais fsync complet à chaque commit
+# - fast : WAL + synchronous=NORMAL (durable hors coupure de courant), caches élargis
+# - bulk : imports massifs, aucun fsync (à ne pas laisser en usage courant)
+PERFORMANCE_PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,            # ~8 Mo
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,           # ms
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,           # ~32 Mo
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'bulk': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -128000,          # ~128 Mo
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+
+DEFAULT_PROFILE = os.environ.get('OPAC_DB_PROFILE', 'fast')
+
+def apply_performance_profile(conn, profile=None):
+    """Appliquer les PRAGMA d'un profil sur une connexion, retourne le nom du profil appliqué"""
+    profile = profile or DEFAULT_PROFILE
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Profil inconnu : {profile} (attendu : {', '.join(PERFORMANCE_PROFILES)})")
+
+    # busy_timeout en premier : le passage en WAL peut attendre un verrou
+    settings = PERFORMANCE_PROFILES[profile]
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    return profile
+
+def read_pragmas(conn):
+    """Valeurs effectives des PRAGMA du profil (pour /api/health)"""
+    return {
+        name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+        for name in PERFORMANCE_PROFILES['fast']
+    }
+
+def init_database(db_path=DB_PATH, profile=None):
     """Créer la base et les tables si elles n'existent pas"""
     
     # Créer le dossier database s'il n'existe pas
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
     # Connexion (crée le fichier si inexistant)
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
+    apply_performance_profile(conn, profile)
     cursor = conn.cursor()
     
     # Table PROJECTS
@@ -51,26 +110,44 @@ def init_database():
     ''')
     
     # Index pour améliorer les performances
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_tasks_project_id 
-        ON tasks(project_id)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_tasks_status 
-        ON tasks(status)
-    ''')
-    
+    # (project_id et status sont couverts par les index composites de migrations.py)
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_tasks_priority 
         ON tasks(priority)
     ''')
     
     conn.commit()
+    
+    # Amener le schéma de base à la dernière version
+    run_migrations(conn)
     conn.close()
     
-    print(f"✅ Base de données initialisée: {DB_PATH}")
-    print(f"📊 Taille du fichier: {os.path.getsize(DB_PATH) / 1024:.2f} Ko")
+    print(f"✅ Base de données initialisée: {db_path}")
+    print(f"📊 Taille du fichier: {os.path.getsize(db_path) / 1024:.2f} Ko")
+
+def repair_project_stats(db_path=DB_PATH):
+    """Reconstruire la table project_stats (réparation après une modification hors application)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        count = rebuild_project_stats(conn)
+        # Invalider les ETag des réponses include=stats servies avant la réparation
+        conn.execute("UPDATE data_revisions SET revision = revision + 1 WHERE name IN ('tasks', 'projects')")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    print(f"📊 Statistiques reconstruites pour {count} projet(s)")
 
 if __name__ == '__main__':
-    init_database()
+    # python init_db.py [chemin.db] [--rebuild-stats]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    path = args[0] if args else DB_PATH
+    
+    if '--rebuild-stats' in sys.argv:
+        repair_project_stats(path)
+    else:
+        init_database(path)
@@ -0,0 +1,337 @@
+"""
+Mesures des requêtes OPAC
+Par route : durée totale, temps passé dans SQLite (requêtes et lignes lues), attente de la
+file d'écriture et sérialisation JSON. Chaque réponse porte un en-tête Server-Timing ;
+les histogrammes cumulés et les quantiles glissants (p50 / p95 / p99) sont exposés au
+format texte Prometheus par GET /api/admin/metrics.
+
+Coût : deux appels à perf_counter() par requête SQL et par sérialisation, un ajout dans
+une deque par requête HTTP ; les quantiles ne sont calculés qu'à la lecture des mesures.
+"""
+
+import bisect
+import sqlite3
+import threading
+import time
+from collections import deque
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+# Bornes (secondes) des histogrammes de durée
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Quantiles calculés sur les dernières requêtes de chaque route
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_WINDOW = 1024
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestTiming:
+    """Temps accumulés pendant une requête HTTP"""
+
+    __slots__ = ('started', 'db', 'queries', 'rows', 'write', 'writes', 'serialize')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.write = 0.0
+        self.writes = 0
+        self.serialize = 0.0
+
+
+class _Current(threading.local):
+    # Mesure de la requête HTTP traitée par le thread (None hors requête : démarrage, thread d'écriture...)
+    timing = None
+
+
+_current = _Current()
+
+
+# ==================== SQLITE ====================
+
+class TimedCursor(sqlite3.Cursor):
+    """Curseur comptant le temps SQLite et les lignes lues (fetch*) pour la requête HTTP en cours,
+    et signalant chaque requête au journal de la connexion (cf. query_log.QueryLog).
+    Les lignes parcourues par itération directe (for row in cursor) ne sont pas comptées."""
+
+    # Requête courante du curseur et temps cumulé (execute + fetch) pour le journal des requêtes ;
+    # executions : nombre de jeux de paramètres (plus de 1 pour executemany)
+    statement = None
+    params = None
+    executions = 1
+    elapsed = 0.0
+    slow_logged = False
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, parameters, 1)
+            self._spent(time.perf_counter() - started, 0, 1)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Paramètres multiples : pas de plan d'exécution dans le journal
+            self._begin(sql, None, len(seq_of_parameters))
+            self._spent(time.perf_counter() - started, 0, len(seq_of_parameters))
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._spent(time.perf_counter() - started, row is not None, 0)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = super().fetchmany(*args, **kwargs)
+        self._spent(time.perf_counter() - started, len(rows), 0)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._spent(time.perf_counter() - started, len(rows), 0)
+        return rows
+
+    def _begin(self, sql, params, executions):
+        self.statement = sql
+        self.params = params
+        self.executions = executions
+        self.elapsed = 0.0
+        self.slow_logged = False
+
+    def _spent(self, seconds, rows, executed):
+        timing = _current.timing
+        if timing is not None:
+            timing.db += seconds
+            timing.rows += rows
+            timing.queries += executed
+
+        query_log = self.connection.query_log
+        if query_log is not None and self.statement is not None:
+            self.elapsed += seconds
+            query_log.record(self, seconds, rows, executed)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connexion dont les curseurs (y compris ceux de conn.execute) sont des TimedCursor.
+    À passer comme factory à sqlite3.connect()."""
+
+    # Journal des requêtes lentes (query_log.QueryLog), affecté à la création de la connexion
+    query_log = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ==================== JSON ====================
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Sérialisation JSON de Flask (jsonify) chronométrée"""
+
+    def dumps(self, obj, **kwargs):
+        timing = _current.timing
+        if timing is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            timing.serialize += time.perf_counter() - started
+
+
+# ==================== AGRÉGATS ====================
+
+class RouteStats:
+    """Mesures cumulées d'une route (méthode + règle d'URL)"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.recent = deque(maxlen=window)
+        self.statuses = {}
+        self.db = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.write = 0.0
+        self.serialize = 0.0
+
+    def add(self, duration, status, timing):
+        self.count += 1
+        self.duration += duration
+        index = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.recent.append(duration)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.db += timing.db
+        self.queries += timing.queries
+        self.rows += timing.rows
+        self.write += timing.write
+        self.serialize += timing.serialize
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{label_value(value)}"' for name, value in labels) + '}'
+
+
+class RequestMetrics:
+    """Mesure des requêtes Flask (hooks before_request / after_request)"""
+
+    def __init__(self, window=DEFAULT_WINDOW, server_timing=True):
+        self.window = window
+        self.server_timing = server_timing
+        self._routes = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def init_app(self, app):
+        """Lire la configuration, chronométrer jsonify et enregistrer les hooks.
+        À appeler avant les autres after_request pour que la durée les inclue
+        (Flask les exécute dans l'ordre inverse d'enregistrement)."""
+        self.window = app.config.get('METRICS_WINDOW', self.window)
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', self.server_timing)
+        app.json = TimedJSONProvider(app)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.clear_request)
+
+    # ==================== HOOKS ====================
+
+    def start_request(self):
+        _current.timing = RequestTiming()
+
+    def finish_request(self, response):
+        timing = _current.timing
+        if timing is None:
+            return response
+        # Les flux (NDJSON, SSE, exports) sont mesurés jusqu'au début de la réponse seulement
+        _current.timing = None
+        duration = time.perf_counter() - timing.started
+
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        key = (request.method, rule)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats(self.window)
+            stats.add(duration, response.status_code, timing)
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = self.server_timing_header(duration, timing)
+        return response
+
+    def clear_request(self, exception=None):
+        _current.timing = None
+
+    def record_write(self, seconds):
+        """Attente d'une modification soumise à la file d'écriture (soumission → commit)"""
+        timing = _current.timing
+        if timing is not None:
+            timing.write += seconds
+            timing.writes += 1
+
+    @staticmethod
+    def server_timing_header(duration, timing):
+        metrics = [
+            f'app;dur={duration * 1000:.2f}',
+            f'db;dur={timing.db * 1000:.2f};desc="{timing.queries} queries, {timing.rows} rows"',
+        ]
+        if timing.writes:
+            metrics.append(f'write;dur={timing.write * 1000:.2f};desc="{timing.writes} jobs"')
+        if timing.serialize:
+            metrics.append(f'serialize;dur={timing.serialize * 1000:.2f}')
+        return ', '.join(metrics)
+
+    # ==================== EXPORT ====================
+
+    def snapshot(self):
+        """Copie des mesures par route (sous verrou, les quantiles sont calculés hors verrou)"""
+        with self._lock:
+            return [
+                (method, rule, stats.count, stats.duration, list(stats.buckets), list(stats.recent),
+                 dict(stats.statuses), stats.db, stats.queries, stats.rows, stats.write, stats.serialize)
+                for (method, rule), stats in sorted(self._routes.items(), key=lambda item: (item[0][1], item[0][0]))
+            ]
+
+    def prometheus(self, gauges=()):
+        """Mesures au format texte Prometheus (exposition 0.0.4).
+        gauges : valeurs instantanées supplémentaires (nom, description, valeur)."""
+        routes = self.snapshot()
+        lines = [
+            '# HELP opac_uptime_seconds Temps écoulé depuis le démarrage du processus',
+            '# TYPE opac_uptime_seconds gauge',
+            f'opac_uptime_seconds {time.time() - self.started:.3f}',
+        ]
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        requests_total = []
+        histogram = []
+        window_quantiles = []
+        totals = {'db': [], 'queries': [], 'rows': [], 'write': [], 'serialize': []}
+
+        for method, rule, count, duration, buckets, recent, statuses, db, queries, rows, write, serialize in routes:
+            route = (('method', method), ('route', rule))
+            for status, status_count in sorted(statuses.items()):
+                requests_total.append(f'opac_http_requests_total{format_labels(route + (("status", status),))} {status_count}')
+
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                histogram.append(
+                    f'opac_http_request_duration_seconds_bucket{format_labels(route + (("le", bound),))} {cumulative}'
+                )
+            histogram.append(f'opac_http_request_duration_seconds_bucket{format_labels(route + (("le", "+Inf"),))} {count}')
+            histogram.append(f'opac_http_request_duration_seconds_sum{format_labels(route)} {duration:.6f}')
+            histogram.append(f'opac_http_request_duration_seconds_count{format_labels(route)} {count}')
+
+            recent.sort()
+            for q in QUANTILES:
+                value = recent[min(len(recent) - 1, int(q * len(recent)))]
+                window_quantiles.append(
+                    f'opac_http_request_duration_window_seconds{format_labels(route + (("quantile", q),))} {value:.6f}'
+                )
+
+            labels = format_labels(route)
+            totals['db'].append(f'opac_db_seconds_total{labels} {db:.6f}')
+            totals['queries'].append(f'opac_db_queries_total{labels} {queries}')
+            totals['rows'].append(f'opac_db_rows_total{labels} {rows}')
+            totals['write'].append(f'opac_write_wait_seconds_total{labels} {write:.6f}')
+            totals['serialize'].append(f'opac_serialize_seconds_total{labels} {serialize:.6f}')
+
+        family('opac_http_requests_total', 'counter', 'Requêtes HTTP traitées', requests_total)
+        family('opac_http_request_duration_seconds', 'histogram', 'Durée des requêtes HTTP', histogram)
+        family('opac_http_request_duration_window_seconds', 'gauge',
+               f'Quantiles de durée sur les {self.window} dernières requêtes de chaque route', window_quantiles)
+        family('opac_db_seconds_total', 'counter', 'Temps passé dans SQLite (lectures du pool)', totals['db'])
+        family('opac_db_queries_total', 'counter', 'Requêtes SQL exécutées', totals['queries'])
+        family('opac_db_rows_total', 'counter', 'Lignes lues (fetch)', totals['rows'])
+        family('opac_write_wait_seconds_total', 'counter', "Attente de la file d'écriture", totals['write'])
+        family('opac_serialize_seconds_total', 'counter', 'Temps de sérialisation JSON', totals['serialize'])
+        for name, help_text, value in gauges:
+            family(name, 'gauge', help_text, [f'{name} {value}'])
+        return '\n'.join(lines) + '\n'
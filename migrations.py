@@ -0,0 +1,310 @@
+"""
+Migrations de schéma OPAC
+Chaque migration numérotée est appliquée une seule fois, suivie via PRAGMA user_version.
+init_db.py crée le schéma de base (version 0), les migrations le font évoluer
+sur les bases neuves comme sur les ~/.opac/tasks.db existantes.
+"""
+
+import sqlite3
+
+
+def rebuild_project_stats(conn):
+    """Recalculer project_stats à partir des tâches (sans commit), retourne le nombre de projets"""
+    conn.execute('DELETE FROM project_stats')
+    cursor = conn.execute('''
+        INSERT INTO project_stats (project_id, total, todo, in_progress, done, load)
+        SELECT p.id,
+            COUNT(t.id),
+            COALESCE(SUM(t.status = 'todo'), 0),
+            COALESCE(SUM(t.status = 'in-progress'), 0),
+            COALESCE(SUM(t.status = 'done'), 0),
+            COALESCE(SUM(t.load), 0)
+        FROM projects p
+        LEFT JOIN tasks t ON t.project_id = p.id
+        GROUP BY p.id
+    ''')
+    return cursor.rowcount
+
+
+def sync_imported_tasks(conn, after_id):
+    """Mettre à jour en une passe les tables dérivées pour les tâches d'id > after_id
+    insérées pendant un import (triggers d'insertion suspendus, cf. migration 8)"""
+    conn.execute(
+        'INSERT INTO tasks_fts (rowid, title, description) SELECT id, title, description FROM tasks WHERE id > ?',
+        (after_id,)
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO change_log (entity, entity_id, op) SELECT 'tasks', id, 'upsert' FROM tasks WHERE id > ? ORDER BY id",
+        (after_id,)
+    )
+    conn.execute('''
+        UPDATE project_stats SET
+            total = project_stats.total + n.total,
+            todo = project_stats.todo + n.todo,
+            in_progress = project_stats.in_progress + n.in_progress,
+            done = project_stats.done + n.done,
+            load = project_stats.load + n.load
+        FROM (
+            SELECT project_id,
+                COUNT(*) AS total,
+                SUM(status = 'todo') AS todo,
+                SUM(status = 'in-progress') AS in_progress,
+                SUM(status = 'done') AS done,
+                COALESCE(SUM(load), 0) AS load
+            FROM tasks WHERE id > ? GROUP BY project_id
+        ) AS n
+        WHERE project_stats.project_id = n.project_id
+    ''', (after_id,))
+    conn.execute("UPDATE data_revisions SET revision = revision + 1 WHERE name = 'tasks'")
+
+
+# Liste ordonnée : (version, description, étapes)
+# Une étape est une requête SQL ou une fonction appelée avec la connexion.
+MIGRATIONS = [
+    (1, 'Index composites pour les listes de tâches', [
+        # GET /api/tasks?project_id=X trié par date de création (+ pagination par curseur)
+        'CREATE INDEX IF NOT EXISTS idx_tasks_project_creation ON tasks(project_id, creation_date, id)',
+        # GET /api/tasks global trié par date de création
+        'CREATE INDEX IF NOT EXISTS idx_tasks_creation ON tasks(creation_date, id)',
+        # Filtres par statut + plage d'échéance
+        'CREATE INDEX IF NOT EXISTS idx_tasks_status_deadline ON tasks(status, deadline)',
+        # Préfixes couverts par les index composites ci-dessus
+        'DROP INDEX IF EXISTS idx_tasks_project_id',
+        'DROP INDEX IF EXISTS idx_tasks_status',
+    ]),
+    (2, 'Index partiels sur les tâches ouvertes', [
+        # Échéances proches / en retard (status != 'done')
+        "CREATE INDEX IF NOT EXISTS idx_tasks_open_deadline ON tasks(deadline) WHERE status != 'done'",
+        # Tâches prioritaires non terminées
+        "CREATE INDEX IF NOT EXISTS idx_tasks_open_priority ON tasks(priority) WHERE status != 'done'",
+        'ANALYZE',
+    ]),
+    (3, 'Échéances au format canonique AAAA-MM-JJ HH:MM:SS', [
+        # Les échéances vides deviennent NULL (tri et filtres "sans échéance")
+        "UPDATE tasks SET deadline = NULL WHERE TRIM(deadline) = ''",
+        # datetime() réécrit les formats ISO lisibles ; les valeurs illisibles sont laissées telles quelles
+        '''UPDATE tasks SET deadline = datetime(deadline)
+           WHERE deadline IS NOT NULL
+           AND datetime(deadline) IS NOT NULL
+           AND deadline != datetime(deadline)''',
+    ]),
+    (4, 'Compteurs de révision par table (ETag des GET)', [
+        '''CREATE TABLE IF NOT EXISTS data_revisions (
+            name TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )''',
+        "INSERT OR IGNORE INTO data_revisions (name, revision) VALUES ('tasks', 0), ('projects', 0)",
+        *[
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_revisions SET revision = revision + 1 WHERE name = '{table}';
+                END'''
+            for table in ('tasks', 'projects')
+            for event in ('INSERT', 'UPDATE', 'DELETE')
+        ],
+    ]),
+    (5, 'Journal des modifications et tombstones (GET /api/changes)', [
+        # Une seule entrée par enregistrement : la dernière modification (upsert ou delete)
+        '''CREATE TABLE IF NOT EXISTS change_log (
+            revision INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_entity ON change_log(entity, entity_id)',
+        # Les enregistrements existants forment la révision initiale
+        "INSERT OR IGNORE INTO change_log (entity, entity_id, op) SELECT 'projects', id, 'upsert' FROM projects",
+        "INSERT OR IGNORE INTO change_log (entity, entity_id, op) SELECT 'tasks', id, 'upsert' FROM tasks",
+        *[
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT OR REPLACE INTO change_log (entity, entity_id, op)
+                    VALUES ('{table}', {row}.id, '{op}');
+                END'''
+            for table in ('tasks', 'projects')
+            for event, row, op in (('INSERT', 'NEW', 'upsert'), ('UPDATE', 'NEW', 'upsert'), ('DELETE', 'OLD', 'delete'))
+        ],
+    ]),
+    (6, 'Statistiques matérialisées par projet (project_stats)', [
+        # Compteurs tenus à jour par les triggers : lecture O(1) par projet
+        # Le nombre de tâches en retard dépend de l'heure et reste calculé à la lecture
+        '''CREATE TABLE IF NOT EXISTS project_stats (
+            project_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            todo INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            load REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_projects_stats_insert
+            AFTER INSERT ON projects
+            BEGIN
+                INSERT OR IGNORE INTO project_stats (project_id) VALUES (NEW.id);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_stats_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                UPDATE project_stats SET
+                    total = total + 1,
+                    todo = todo + (NEW.status = 'todo'),
+                    in_progress = in_progress + (NEW.status = 'in-progress'),
+                    done = done + (NEW.status = 'done'),
+                    load = load + COALESCE(NEW.load, 0)
+                WHERE project_id = NEW.project_id;
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_stats_update
+            AFTER UPDATE OF status, load, project_id ON tasks
+            BEGIN
+                UPDATE project_stats SET
+                    total = total - 1,
+                    todo = todo - (OLD.status = 'todo'),
+                    in_progress = in_progress - (OLD.status = 'in-progress'),
+                    done = done - (OLD.status = 'done'),
+                    load = load - COALESCE(OLD.load, 0)
+                WHERE project_id = OLD.project_id;
+                UPDATE project_stats SET
+                    total = total + 1,
+                    todo = todo + (NEW.status = 'todo'),
+                    in_progress = in_progress + (NEW.status = 'in-progress'),
+                    done = done + (NEW.status = 'done'),
+                    load = load + COALESCE(NEW.load, 0)
+                WHERE project_id = NEW.project_id;
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_stats_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE project_stats SET
+                    total = total - 1,
+                    todo = todo - (OLD.status = 'todo'),
+                    in_progress = in_progress - (OLD.status = 'in-progress'),
+                    done = done - (OLD.status = 'done'),
+                    load = load - COALESCE(OLD.load, 0)
+                WHERE project_id = OLD.project_id;
+            END''',
+        rebuild_project_stats,
+    ]),
+    (7, 'Recherche plein texte FTS5 sur les tâches (GET /api/search)', [
+        # Index externe : le texte reste dans tasks, tasks_fts ne stocke que l'index
+        # remove_diacritics : "echeance" trouve "échéance" ; prefix : recherche "mot*" rapide
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content='tasks', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )''',
+        # Classement BM25 par défaut (colonne rank) : le titre pèse plus que la description
+        "INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (NEW.id, NEW.title, NEW.description);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update
+            AFTER UPDATE OF title, description ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description);
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (NEW.id, NEW.title, NEW.description);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            END''',
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+    ]),
+    (8, "Triggers d'insertion de tâches suspendus pendant un import (POST /api/import)", [
+        # Une ligne n'existe dans bulk_import que dans la transaction d'un import, jamais après commit :
+        # les tables dérivées sont alors mises à jour par paquet (cf. sync_imported_tasks)
+        'CREATE TABLE IF NOT EXISTS bulk_import (active INTEGER NOT NULL)',
+        'DROP TRIGGER IF EXISTS trg_tasks_revision_insert',
+        'DROP TRIGGER IF EXISTS trg_tasks_changes_insert',
+        'DROP TRIGGER IF EXISTS trg_tasks_stats_insert',
+        'DROP TRIGGER IF EXISTS trg_tasks_fts_insert',
+        '''CREATE TRIGGER trg_tasks_revision_insert
+            AFTER INSERT ON tasks
+            WHEN NOT EXISTS (SELECT 1 FROM bulk_import)
+            BEGIN
+                UPDATE data_revisions SET revision = revision + 1 WHERE name = 'tasks';
+            END''',
+        '''CREATE TRIGGER trg_tasks_changes_insert
+            AFTER INSERT ON tasks
+            WHEN NOT EXISTS (SELECT 1 FROM bulk_import)
+            BEGIN
+                INSERT OR REPLACE INTO change_log (entity, entity_id, op)
+                VALUES ('tasks', NEW.id, 'upsert');
+            END''',
+        '''CREATE TRIGGER trg_tasks_stats_insert
+            AFTER INSERT ON tasks
+            WHEN NOT EXISTS (SELECT 1 FROM bulk_import)
+            BEGIN
+                UPDATE project_stats SET
+                    total = total + 1,
+                    todo = todo + (NEW.status = 'todo'),
+                    in_progress = in_progress + (NEW.status = 'in-progress'),
+                    done = done + (NEW.status = 'done'),
+                    load = load + COALESCE(NEW.load, 0)
+                WHERE project_id = NEW.project_id;
+            END''',
+        '''CREATE TRIGGER trg_tasks_fts_insert
+            AFTER INSERT ON tasks
+            WHEN NOT EXISTS (SELECT 1 FROM bulk_import)
+            BEGIN
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (NEW.id, NEW.title, NEW.description);
+            END''',
+    ]),
+    (9, 'Suppression des index redondants recréés par init_db.py', [
+        # Les anciennes versions de init_db.py recréaient les index supprimés par la migration 1
+        'DROP INDEX IF EXISTS idx_tasks_project_id',
+        'DROP INDEX IF EXISTS idx_tasks_status',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn):
+    """Version de schéma enregistrée dans la base"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def run_migrations(conn, verbose=True):
+    """Appliquer les migrations manquantes, retourne la liste des versions appliquées"""
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        # Verrou d'écriture immédiat : un autre processus peut migrer en même temps
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        if verbose:
+            print(f"🔧 Migration {version} appliquée : {description}")
+
+    return applied
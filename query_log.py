@@ -0,0 +1,196 @@
+"""
+Journal des requêtes SQL OPAC
+Chaque requête exécutée sur une connexion du pool ou de la file d'écriture (metrics.TimedConnection)
+est chronométrée, execute et fetch compris. Les requêtes plus lentes que le seuil sont journalisées
+avec leurs paramètres et leur plan (EXPLAIN QUERY PLAN) ; les requêtes normalisées (littéraux
+remplacés par ?) sont agrégées pour GET /api/admin/queries. Un executemany compte une exécution
+par jeu de paramètres et n'est journalisé que si la durée moyenne d'une exécution dépasse le seuil.
+"""
+
+import re
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+# Requêtes normalisées distinctes suivies (au-delà, les nouvelles ne sont plus agrégées)
+MAX_TRACKED_QUERIES = 1000
+
+# Requêtes lentes récentes conservées
+RECENT_SLOW_QUERIES = 50
+
+# Longueur maximale des paramètres journalisés
+MAX_PARAMS_LENGTH = 200
+
+# Seules ces requêtes ont un plan (BEGIN, PRAGMA, SAVEPOINT... n'en ont pas)
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Forme canonique d'une requête : littéraux remplacés par ?, listes IN (?, ?, ...) repliées"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('IN (?, ...)', sql)
+    return ' '.join(sql.split())
+
+
+def format_plan(rows):
+    """Lignes d'EXPLAIN QUERY PLAN (id, parent, notused, detail) indentées selon l'arbre"""
+    depth = {0: -1}
+    lines = []
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[3]
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+class QueryStats:
+    """Agrégat d'une requête normalisée"""
+
+    __slots__ = ('sql', 'count', 'total', 'max', 'rows', 'slow', 'plan', 'last_slow')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.plan = None
+        self.last_slow = None
+
+    def to_dict(self):
+        plan = self.plan or []
+        return {
+            'sql': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0,
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows,
+            'slow': self.slow,
+            'plan': self.plan,
+            # Signaux fréquents d'index manquant
+            'full_scan': any(
+                line.strip().startswith('SCAN ') and 'COVERING INDEX' not in line and 'VIRTUAL TABLE' not in line
+                for line in plan
+            ),
+            'temp_b_tree': any('USE TEMP B-TREE' in line for line in plan),
+            'last_slow': self.last_slow,
+        }
+
+
+class QueryLog:
+    """Journal des requêtes lentes et classement des requêtes les plus coûteuses"""
+
+    def __init__(self, threshold=0.1, max_tracked=MAX_TRACKED_QUERIES):
+        self.threshold = threshold
+        self.max_tracked = max_tracked
+        self._queries = {}
+        self._normalized = {}
+        self._recent = deque(maxlen=RECENT_SLOW_QUERIES)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    # ==================== ENREGISTREMENT ====================
+
+    def record(self, cursor, seconds, rows, executed):
+        """Appelé par metrics.TimedCursor après execute / fetch.
+        cursor.elapsed cumule le temps de la requête courante du curseur."""
+        sql = cursor.statement
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._normalized) < self.max_tracked * 4:
+                self._normalized[sql] = key
+
+        with self._lock:
+            stats = self._queries.get(key)
+            if stats is None:
+                if len(self._queries) >= self.max_tracked:
+                    self.dropped += 1
+                    return
+                stats = self._queries[key] = QueryStats(key)
+            stats.count += executed
+            stats.total += seconds
+            stats.rows += rows
+            # executemany : durée moyenne d'une exécution, pas celle du paquet
+            elapsed = cursor.elapsed / max(cursor.executions, 1)
+            stats.max = max(stats.max, elapsed)
+
+        # Journalisée une seule fois par exécution, dès que le seuil est franchi
+        if elapsed >= self.threshold and not cursor.slow_logged:
+            cursor.slow_logged = True
+            self._log_slow(stats, cursor)
+
+    def _log_slow(self, stats, cursor):
+        if cursor.executions > 1:
+            params = f'{cursor.executions} jeux de paramètres (executemany)'
+        else:
+            params = repr(cursor.params)
+        if len(params) > MAX_PARAMS_LENGTH:
+            params = params[:MAX_PARAMS_LENGTH] + '...'
+        plan = self.explain(cursor.connection, cursor.statement, cursor.params)
+        sample = {
+            'sql': ' '.join(cursor.statement.split()),
+            'params': params,
+            'executions': cursor.executions,
+            'duration_ms': round(cursor.elapsed * 1000, 3),
+            'plan': plan,
+            'at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._lock:
+            stats.slow += 1
+            stats.last_slow = sample
+            if plan is not None:
+                stats.plan = plan
+            self._recent.appendleft(sample)
+
+        print(f"🐢 Requête lente ({sample['duration_ms']} ms) : {sample['sql']} | paramètres : {params}")
+        for line in plan or []:
+            print(f'   {line}')
+
+    @staticmethod
+    def explain(conn, sql, params):
+        """Plan d'exécution d'une requête, None si elle n'en a pas ou s'il est impossible à obtenir"""
+        if params is None or not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        try:
+            # Curseur sqlite3 standard : le plan n'est ni chronométré ni journalisé
+            cursor = conn.cursor(sqlite3.Cursor)
+            return format_plan(cursor.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall())
+        except sqlite3.Error:
+            return None
+
+    # ==================== CONSULTATION ====================
+
+    def top(self, limit=20, sort='total'):
+        """Requêtes normalisées les plus coûteuses (sort : total, max, count, mean)"""
+        with self._lock:
+            queries = [stats.to_dict() for stats in self._queries.values()]
+        key = {'total': 'total_ms', 'max': 'max_ms', 'count': 'count', 'mean': 'mean_ms'}[sort]
+        return sorted(queries, key=lambda query: query[key], reverse=True)[:limit]
+
+    def recent_slow(self):
+        with self._lock:
+            return list(self._recent)
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._recent.clear()
+            self.dropped = 0
+
+    def status(self):
+        with self._lock:
+            tracked = len(self._queries)
+        return {
+            'threshold_ms': round(self.threshold * 1000, 3),
+            'tracked': tracked,
+            'dropped': self.dropped,
+        }
@@ -0,0 +1,254 @@
+"""
+Cache de lecture OPAC : projets et tâches gardés en mémoire dans le processus
+Index par id, par projet et par statut ; les GET fréquents (listes des <select>, Kanban)
+sont servis sans toucher à la base.
+
+Fraîcheur :
+- la file d'écriture appelle invalidate() après chaque commit (write-through) ;
+- PRAGMA data_version détecte les commits des autres processus (vérifié au plus
+  toutes les `validate_interval` secondes) ;
+- la mise à jour relit seulement les lignes citées dans change_log depuis la dernière
+  révision chargée (cf. migration 5), ou recharge tout s'il y en a trop.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Au-delà, un rechargement complet coûte moins cher que la relecture ligne à ligne
+MAX_INCREMENTAL_CHANGES = 5000
+
+# Identifiants relus par requête IN (...)
+FETCH_CHUNK_IDS = 500
+
+CACHED_ENTITIES = ('projects', 'tasks')
+
+
+def creation_order(row):
+    """Clé du tri par défaut (creation_date, id), à utiliser avec reverse=True"""
+    return (row['creation_date'] or '', row['id'])
+
+
+class ReadCache:
+    """Modèle de lecture en mémoire des projets et des tâches.
+    Les dictionnaires renvoyés sont partagés : les appelants ne doivent pas les modifier."""
+
+    def __init__(self, db_path, setup=None, validate_interval=1.0, max_incremental=MAX_INCREMENTAL_CHANGES):
+        self.db_path = db_path
+        self.setup = setup
+        self.validate_interval = validate_interval
+        self.max_incremental = max_incremental
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._loaded = False
+        self._stale = False
+        self._checked_at = 0.0
+        self._data_version = None
+        self.revision = 0
+
+        self._rows = {entity: {} for entity in CACHED_ENTITIES}
+        self._tasks_by_project = {}
+        self._tasks_by_status = {}
+        self._revisions = {}
+
+        self._reads = 0
+        self._refreshes = 0
+        self._reloads = 0
+
+    # ==================== LECTURES ====================
+
+    def projects(self):
+        """Tous les projets, du plus récent au plus ancien"""
+        with self._fresh():
+            return sorted(self._rows['projects'].values(), key=creation_order, reverse=True)
+
+    def project(self, project_id):
+        with self._fresh():
+            return self._rows['projects'].get(project_id)
+
+    def task(self, task_id):
+        with self._fresh():
+            return self._rows['tasks'].get(task_id)
+
+    def tasks(self, statuses=None, project_ids=None, with_project_name=False):
+        """Tâches filtrées par statut et / ou projet, triées comme GET /api/tasks par défaut"""
+        with self._fresh():
+            tasks = self._rows['tasks']
+            ids = None
+            if project_ids is not None:
+                ids = set().union(*(self._tasks_by_project.get(pid, ()) for pid in project_ids))
+            if statuses is not None:
+                by_status = set().union(*(self._tasks_by_status.get(status, ()) for status in statuses))
+                ids = by_status if ids is None else ids & by_status
+            rows = tasks.values() if ids is None else [tasks[task_id] for task_id in ids]
+            rows = sorted(rows, key=creation_order, reverse=True)
+
+            if with_project_name:
+                projects = self._rows['projects']
+                rows = [
+                    {**row, 'project_name': projects[row['project_id']]['name'] if row['project_id'] in projects else None}
+                    for row in rows
+                ]
+            return rows
+
+    def revisions(self, tables):
+        """Compteurs de data_revisions au format de read_revisions() (ETag)"""
+        with self._fresh():
+            return [f'{name}:{self._revisions[name]}' for name in sorted(tables) if name in self._revisions]
+
+    # ==================== FRAÎCHEUR ====================
+
+    def invalidate(self):
+        """Hook de la file d'écriture : une modification vient d'être validée"""
+        self._stale = True
+
+    @contextmanager
+    def _fresh(self):
+        """Verrou du cache, pris après mise à jour si nécessaire"""
+        with self._lock:
+            self._refresh()
+            self._reads += 1
+            yield
+
+    def _refresh(self):
+        if not self._loaded:
+            self._reload()
+            return
+
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at < self.validate_interval:
+            return
+        self._checked_at = now
+
+        # Remis à zéro avant la lecture : une invalidation pendant la mise à jour n'est pas perdue
+        stale, self._stale = self._stale, False
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if not stale and data_version == self._data_version:
+            return
+        self._data_version = data_version
+        self._apply_changes()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.setup:
+            self.setup(conn)
+        return conn
+
+    def _reload(self):
+        """Chargement complet dans une transaction de lecture (instantané cohérent)"""
+        if self._conn is None:
+            self._conn = self._connect()
+        conn = self._conn
+        self._stale = False
+        self._checked_at = time.monotonic()
+        self._data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+
+        conn.execute('BEGIN')
+        try:
+            self.revision = conn.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+            for entity in CACHED_ENTITIES:
+                self._rows[entity] = {row['id']: dict(row) for row in conn.execute(f'SELECT * FROM {entity}')}
+            self._read_revisions(conn)
+        finally:
+            conn.commit()
+
+        self._tasks_by_project = {}
+        self._tasks_by_status = {}
+        for task in self._rows['tasks'].values():
+            self._index_task(task)
+        self._loaded = True
+        self._reloads += 1
+
+    def _apply_changes(self):
+        """Relire les lignes modifiées depuis la dernière révision chargée"""
+        conn = self._conn
+        conn.execute('BEGIN')
+        try:
+            changes = conn.execute(
+                'SELECT revision, entity, entity_id, op FROM change_log WHERE revision > ? ORDER BY revision LIMIT ?',
+                (self.revision, self.max_incremental + 1)
+            ).fetchall()
+            if len(changes) > self.max_incremental:
+                conn.commit()
+                self._reload()
+                return
+
+            touched = {entity: set() for entity in CACHED_ENTITIES}
+            for change in changes:
+                if change['entity'] in touched:
+                    touched[change['entity']].add(change['entity_id'])
+
+            # Lignes courantes des enregistrements cités (absentes = supprimées)
+            for entity, ids in touched.items():
+                ids = list(ids)
+                current = {}
+                for start in range(0, len(ids), FETCH_CHUNK_IDS):
+                    chunk = ids[start:start + FETCH_CHUNK_IDS]
+                    rows = conn.execute(
+                        f"SELECT * FROM {entity} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    current.update((row['id'], dict(row)) for row in rows)
+                for item_id in ids:
+                    self._store(entity, item_id, current.get(item_id))
+
+            if changes:
+                self.revision = changes[-1]['revision']
+            self._read_revisions(conn)
+        finally:
+            if conn.in_transaction:
+                conn.commit()
+        self._refreshes += 1
+
+    def _read_revisions(self, conn):
+        self._revisions = {
+            row['name']: row['revision'] for row in conn.execute('SELECT name, revision FROM data_revisions')
+        }
+
+    # ==================== INDEX ====================
+
+    def _store(self, entity, item_id, row):
+        """Remplacer (ou supprimer si row est None) un enregistrement et ses entrées d'index"""
+        previous = self._rows[entity].pop(item_id, None)
+        if entity == 'tasks' and previous is not None:
+            self._unindex_task(previous)
+        if row is not None:
+            self._rows[entity][item_id] = row
+            if entity == 'tasks':
+                self._index_task(row)
+
+    def _index_task(self, task):
+        self._tasks_by_project.setdefault(task['project_id'], set()).add(task['id'])
+        self._tasks_by_status.setdefault(task['status'], set()).add(task['id'])
+
+    def _unindex_task(self, task):
+        for index, key in ((self._tasks_by_project, task['project_id']), (self._tasks_by_status, task['status'])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(task['id'])
+                if not ids:
+                    del index[key]
+
+    # ==================== ÉTAT ====================
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._loaded = False
+
+    def stats(self):
+        """Informations exposées par /api/health"""
+        return {
+            'loaded': self._loaded,
+            'revision': self.revision,
+            'projects': len(self._rows['projects']),
+            'tasks': len(self._rows['tasks']),
+            'reads': self._reads,
+            'refreshes': self._refreshes,
+            'reloads': self._reloads,
+        }
+
@@ -0,0 +1,90 @@
+"""
+Serveur de production OPAC
+Sert l'application Flask avec waitress (pur Python, embarquable par PyInstaller / Nuitka) :
+pool de threads, keep-alive, file d'attente bornée et arrêt propre sur SIGINT / SIGTERM.
+Sans waitress, repli sur le serveur WSGI multi-thread de Werkzeug.
+
+Usage : python serve.py (ou python app.py ; OPAC_DEBUG=1 pour le serveur de développement)
+"""
+
+import os
+import signal
+
+# Dépendance optionnelle : sans waitress, repli sur Werkzeug
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+
+def default_threads():
+    """Threads de traitement : les requêtes attendent surtout SQLite et les flux SSE, plusieurs threads par cœur"""
+    return min(64, max(8, (os.cpu_count() or 1) * 4))
+
+
+def server_settings():
+    """Réglages du serveur (surchargeables par variables d'environnement)"""
+    return {
+        'host': os.environ.get('OPAC_HOST', '127.0.0.1'),
+        'port': int(os.environ.get('OPAC_PORT', 5000)),
+        'threads': int(os.environ.get('OPAC_THREADS', default_threads())),
+        # Connexions ouvertes simultanément ; au-delà, les suivantes attendent dans la file du socket
+        'connection_limit': int(os.environ.get('OPAC_CONNECTION_LIMIT', 200)),
+        # File d'attente listen() du socket
+        'backlog': int(os.environ.get('OPAC_BACKLOG', 1024)),
+        # Fermeture des connexions keep-alive inactives (secondes)
+        'keepalive_timeout': int(os.environ.get('OPAC_KEEPALIVE_TIMEOUT', 60)),
+    }
+
+
+def serve(app, settings=None, on_shutdown=None):
+    """Servir app jusqu'à SIGINT / SIGTERM.
+    on_shutdown est appelé dès le signal (fermer les flux longs) ; waitress cesse alors
+    d'accepter des connexions et laisse quelques secondes aux requêtes en cours."""
+    settings = settings or server_settings()
+
+    def stop(signum, frame):
+        if on_shutdown:
+            on_shutdown()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    if waitress is None:
+        return serve_werkzeug(app, settings)
+
+    server = waitress.create_server(
+        app,
+        host=settings['host'],
+        port=settings['port'],
+        threads=settings['threads'],
+        connection_limit=settings['connection_limit'],
+        backlog=settings['backlog'],
+        channel_timeout=settings['keepalive_timeout'],
+        ident='OPAC'
+    )
+    print(f"🚀 OPAC sur http://{settings['host']}:{settings['port']} "
+          f"(waitress, {settings['threads']} threads)")
+    # run() intercepte SystemExit et attend la fin des requêtes en cours
+    server.run()
+    print("👋 Serveur arrêté")
+
+
+def serve_werkzeug(app, settings):
+    """Repli sans waitress : serveur Werkzeug multi-thread (sans débogueur ni rechargement)"""
+    from werkzeug.serving import make_server
+
+    server = make_server(settings['host'], settings['port'], app, threaded=True)
+    print(f"⚠️  waitress non installé, serveur Werkzeug multi-thread sur "
+          f"http://{settings['host']}:{settings['port']}")
+    try:
+        server.serve_forever()
+    except SystemExit:
+        server.server_close()
+    print("👋 Serveur arrêté")
+
+
+if __name__ == '__main__':
+    from app import serve_production
+    serve_production()
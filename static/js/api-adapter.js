@@ -47,6 +47,14 @@ window.api = {
             return apiRequest(`${API_BASE_URL}/projects`);
         },
 
+        /**
+         * Récupérer tous les projets avec leurs statistiques de tâches
+         * API: GET /api/projects?include=stats
+         */
+        getAllWithStats: async () => {
+            return apiRequest(`${API_BASE_URL}/projects?include=stats`);
+        },
+
         /**
          * Récupérer un projet par ID
          * IPC: projects:getById
@@ -56,6 +64,14 @@ window.api = {
             return apiRequest(`${API_BASE_URL}/projects/${id}`);
         },
 
+        /**
+         * Récupérer un projet avec ses statistiques de tâches
+         * API: GET /api/projects/:id?include=stats
+         */
+        getByIdWithStats: async (id) => {
+            return apiRequest(`${API_BASE_URL}/projects/${id}?include=stats`);
+        },
+
         /**
          * Créer un nouveau projet
          * IPC: projects:create
@@ -137,6 +153,57 @@ window.api = {
             return apiRequest(`${API_BASE_URL}/tasks`);
         },
 
+        /**
+         * Récupérer toutes les tâches avec le nom de leur projet
+         * API: GET /api/tasks?include=project
+         */
+        getAllWithProject: async () => {
+            return apiRequest(`${API_BASE_URL}/tasks?include=project`);
+        },
+
+        /**
+         * Récupérer les tâches filtrées et triées côté serveur
+         * API: GET /api/tasks?status=...&project_id=...&priority=...&sort=...
+         * filters : { status, project_id, priority, responsible, deadline_from, deadline_to,
+         *             created_from, created_to, sort, include }
+         */
+        getFiltered: async (filters = {}) => {
+            const params = new URLSearchParams();
+            Object.entries(filters).forEach(([key, value]) => {
+                if (value !== null && value !== undefined && value !== '' && value !== 'all') {
+                    params.set(key, value);
+                }
+            });
+            return apiRequest(`${API_BASE_URL}/tasks?${params}`);
+        },
+
+        /**
+         * Recherche plein texte (titre et description), classée par pertinence
+         * API: GET /api/search?q=texte&project_id=X&status=todo,in-progress
+         * Les extraits (task.snippets) sont du HTML avec les termes trouvés dans <mark>
+         */
+        search: async (query, filters = {}) => {
+            const params = new URLSearchParams({ q: query });
+            Object.entries(filters).forEach(([key, value]) => {
+                if (value !== null && value !== undefined && value !== '' && value !== 'all') {
+                    params.set(key, value);
+                }
+            });
+            return apiRequest(`${API_BASE_URL}/search?${params}`);
+        },
+
+        /**
+         * Récupérer une page de tâches (pagination par curseur)
+         * API: GET /api/tasks?limit=N&after=CURSOR
+         * La réponse contient next_cursor (null sur la dernière page)
+         */
+        getPage: async (limit, after = null, projectId = null) => {
+            const params = new URLSearchParams({ limit });
+            if (after) params.set('after', after);
+            if (projectId) params.set('project_id', projectId);
+            return apiRequest(`${API_BASE_URL}/tasks?${params}`);
+        },
+
         /**
          * Récupérer une tâche par ID
          * IPC: tasks:getById
@@ -158,19 +225,19 @@ window.api = {
         /**
          * Récupérer les tâches prioritaires
          * IPC: tasks:getHighPriority
-         * API: GET /api/tasks/high-priority
+         * API: GET /api/tasks/high-priority?include=project
          */
         getHighPriority: async () => {
-            return apiRequest(`${API_BASE_URL}/tasks/high-priority`);
+            return apiRequest(`${API_BASE_URL}/tasks/high-priority?include=project`);
         },
 
         /**
          * Récupérer les tâches à échéance proche
          * IPC: tasks:getDueSoon
-         * API: GET /api/tasks/due-soon
+         * API: GET /api/tasks/due-soon?days=N&include=project
          */
-        getDueSoon: async () => {
-            return apiRequest(`${API_BASE_URL}/tasks/due-soon`);
+        getDueSoon: async (days = 2) => {
+            return apiRequest(`${API_BASE_URL}/tasks/due-soon?days=${days}&include=project`);
         },
 
         /**
@@ -185,6 +252,18 @@ window.api = {
             });
         },
 
+        /**
+         * Mettre à jour plusieurs champs en une seule requête
+         * API: PATCH /api/tasks/:id
+         * fields : sous-ensemble de { title, description, deadline, status, priority, load, responsible, project_id }
+         */
+        update: async (id, fields) => {
+            return apiRequest(`${API_BASE_URL}/tasks/${id}`, {
+                method: 'PATCH',
+                body: JSON.stringify(fields)
+            });
+        },
+
         /**
          * Mettre à jour le titre
          * IPC: tasks:updateTitle
@@ -337,6 +416,81 @@ window.api = {
                 method: 'DELETE'
             });
         }
+    },
+
+    // ==================== DASHBOARD ====================
+    dashboard: {
+        /**
+         * Données de la page d'accueil en une requête
+         * API: GET /api/dashboard?days=N
+         * data : { due_soon, high_priority, counts, overdue, projects }
+         */
+        get: async (days = 2) => {
+            return apiRequest(`${API_BASE_URL}/dashboard?days=${days}`);
+        }
+    },
+
+    // ==================== SYNCHRONISATION ====================
+    changes: {
+        /**
+         * Modifications (et suppressions) depuis une révision
+         * API: GET /api/changes?since=N
+         * data : { revision, tasks, projects, deleted: { tasks, projects } }
+         */
+        since: async (revision = 0) => {
+            return apiRequest(`${API_BASE_URL}/changes?since=${revision}`);
+        }
+    },
+
+    // ==================== ÉVÉNEMENTS ====================
+    events: {
+        /**
+         * S'abonner aux modifications faites depuis n'importe quelle fenêtre
+         * API: GET /api/events (Server-Sent Events, reconnexion automatique)
+         * onChange est appelé une fois par rafale de modifications (anti-rebond)
+         */
+        subscribe: (onChange, delay = 300, retryDelay = 30000) => {
+            let timer = null;
+
+            const notify = (event) => {
+                clearTimeout(timer);
+                timer = setTimeout(() => onChange(JSON.parse(event.data)), delay);
+            };
+
+            const connect = (reconnecting = false) => {
+                const source = new EventSource(`${API_BASE_URL}/events`);
+                source.addEventListener('change', notify);
+                source.addEventListener('resync', notify);
+
+                // Nouveau flux sans Last-Event-ID : recharger ce qui a pu être manqué
+                if (reconnecting) {
+                    source.onopen = () => onChange(null);
+                }
+
+                // Serveur saturé (503) : EventSource abandonne, nouvelle tentative plus tard
+                source.onerror = () => {
+                    if (source.readyState === EventSource.CLOSED) {
+                        setTimeout(() => connect(true), retryDelay);
+                    }
+                };
+                return source;
+            };
+
+            return connect();
+        }
+    },
+
+    // ==================== BATCH ====================
+    /**
+     * Exécuter plusieurs opérations en une requête et une transaction
+     * API: POST /api/batch
+     * operations : [{ op: 'create'|'update'|'delete', resource: 'tasks'|'projects', id, data }]
+     */
+    batch: async (operations) => {
+        return apiRequest(`${API_BASE_URL}/batch`, {
+            method: 'POST',
+            body: JSON.stringify({ operations })
+        });
     }
 };
 
@@ -4,6 +4,9 @@ document.addEventListener('DOMContentLoaded', init);
 async function init() {
   initEventListeners();
   await loadStats();
+
+  // Rafraîchir quand une autre fenêtre modifie les données
+  window.api.events.subscribe(() => loadStats());
 }
 
 function initEventListeners() {
@@ -25,61 +28,41 @@ function initEventListeners() {
 
 async function loadStats() {
   try {
-    await loadStatDueDate();
-    await loadStatImportant();
-      
-      // Calculer la valeur totale
-      // const totalValue = products.reduce((sum, product) => {
-      //   return sum + (product.price * product.stock);
-      // }, 0);
-      // document.getElementById('totalValue').textContent = formatPrice(totalValue);
+    // Une seule requête pour toute la page d'accueil
+    const dashboard = await window.api.dashboard.get();
+    if (!dashboard.success) {
+      throw new Error(dashboard.error);
+    }
+
+    const { due_soon, high_priority, projects } = dashboard.data;
+    const projectNames = Object.fromEntries(projects.map(p => [p.id, p.name]));
+
+    await renderTaskColumn('column-dueSoon', 'dueSoonTasksCount', due_soon, projectNames);
+    await renderTaskColumn('column-importantTask', 'importantTasksCount', high_priority, projectNames);
+    console.log("✅ Tableau de bord chargé.");
+
+    document.querySelector('#modal-task #task-project').innerHTML = "";
+    projects.forEach(p => {
+        const option = document.createElement('option');
+        option.value = p.id;
+        option.innerHTML = p.name;
+        
+        document.querySelector('#modal-task #task-project').appendChild(option);
+    });
   } catch (error) {
     console.error('Erreur lors du chargement des statistiques:', error);
     showNotification('Erreur lors du chargement des statistiques', 'error');
   }
-
-  const projects = await window.api.projects.getAll();
-    
-  document.querySelector('#modal-task #task-project').innerHTML = "";
-  projects.data.forEach(p => {
-      const option = document.createElement('option');
-      option.value = p.id;
-      option.innerHTML = p.name;
-      
-      document.querySelector('#modal-task #task-project').appendChild(option);
-  });
 }
 
-async function loadStatDueDate() {
-  document.getElementById('column-dueSoon').innerHTML = '';
-  const dueSoonTasks = await window.api.tasks.getDueSoon();
-  if (dueSoonTasks.success) {
-    document.getElementById('dueSoonTasksCount').textContent = dueSoonTasks.data.length;
-    await Promise.all(
-        dueSoonTasks.data.map(async (task) => {
-            const card = await createTaskCard(task);
-            document.getElementById('column-dueSoon').appendChild(card);
-        })
-    );
-  } else {
-    console.log("✅ Aucune tâche n'est due pour bientôt.");
-  }
-}
+async function renderTaskColumn(columnId, counterId, tasks, projectNames) {
+  const column = document.getElementById(columnId);
+  column.innerHTML = '';
+  document.getElementById(counterId).textContent = tasks.length;
 
-async function loadStatImportant() {
-  document.getElementById('column-importantTask').innerHTML = '';
-  const importantTasks = await window.api.tasks.getHighPriority();
-  if (importantTasks.success) {
-    document.getElementById('importantTasksCount').textContent = importantTasks.data.length;
-    await Promise.all(
-        importantTasks.data.map(async (task) => {
-            const card = await createTaskCard(task);
-            document.getElementById('column-importantTask').appendChild(card);
-        })
-    );
-    console.log("✅ Tâches importantes chargées.");
-  } else {
-        console.log("✅ Aucune tâche importante n'est due.");
+  for (const task of tasks) {
+    task.project_name = projectNames[task.project_id];
+    column.appendChild(await createTaskCard(task));
   }
 }
 
@@ -104,9 +87,9 @@ async function createTaskCard(task) {
   }
   
   let projectHTML = '';
-  const project = await window.api.projects.getById(task.project_id);
-  if(project.success) {
-      projectHTML = `<div class="task-project"><span>📂 ${project.data.name}</span></div>`;
+  if (task.project_name) {
+      // Nom du projet joint par le serveur (include=project)
+      projectHTML = `<div class="task-project"><span>📂 ${task.project_name}</span></div>`;
   }
 
   // Description tronquée (2 lignes max)
@@ -205,101 +188,29 @@ async function handleSubmitTask(e) {
 
   try {
           // Mise à jour
-          const existingTask = await window.api.tasks.getById(taskId);
-          const updatedTask = {
-              ...existingTask,
-              ...taskData,
-              modifiedAt: new Date().toISOString()
-          };
-
-          let editSuccess = true;
-          
-          if(existingTask.project_id !== taskData.project_id) {
-              const uProject = await window.api.tasks.updateProjectId(updatedTask.id, updatedTask.project_id);
-              if(uProject.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Projet modifié");
-              } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Projet non modifié -", uProject.error);
-                  editSuccess = false;
-                  showNotification("Le projet de la tâche n'a pas pu être modifié.", 'error');
+          const existingTask = (await window.api.tasks.getById(taskId)).data;
+
+          // Un seul PATCH avec uniquement les champs modifiés
+          const changes = {};
+          ['project_id', 'title', 'description', 'deadline', 'priority', 'status'].forEach(field => {
+              // L'échéance est stockée en 'AAAA-MM-JJ HH:MM:SS', le formulaire ne manipule que la date
+              const current = field === 'deadline' ? (existingTask.deadline || '').slice(0, 10) : existingTask[field];
+              if (String(current ?? '') !== String(taskData[field] ?? '')) {
+                  changes[field] = taskData[field];
               }
-          } else {
-              console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du projet");
-          }
+          });
 
-          if(existingTask.title !== taskData.title) {
-              const uTitle = await window.api.tasks.updateTitle(updatedTask.id, updatedTask.title);
-              if(uTitle.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Titre modifié");
-              } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Titre non modifié -", uTitle.error);
-                  editSuccess = false;
-                  showNotification("Le titre de la tâche n'a pas pu être modifié.", 'error');
-              }
+          if (Object.keys(changes).length === 0) {
+              console.log("✏️ Tâche", taskId, ": Aucune modification");
           } else {
-              console.log("✏️ Tâche", existingTask.id, ": Pas de modification du titre");
-          }
-
-          if(existingTask.description !== taskData.description) {
-              const uDesc = await window.api.tasks.updateDescription(updatedTask.id, updatedTask.description);
-              if(uDesc.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Description modifiée");
+              const uTask = await window.api.tasks.update(taskId, changes);
+              if(uTask.success) {
+                  console.log("✏️ ✅ Tâche", taskId, ": Champs modifiés -", Object.keys(changes));
+                  showNotification("Tâche " + taskData.title + " modifiée !")
               } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Description non modifiée -", uDesc.error);
-                  editSuccess = false;
-                  showNotification("La description de la tâche n'a pas pu être modifiée.", 'error');
+                  console.log("✏️ ❌ Tâche", taskId, ": Non modifiée -", uTask.error);
+                  showNotification("La tâche n'a pas pu être modifiée.", 'error');
               }
-          } else {
-              console.log("✏️ Tâche", updatedTask.id, ": Pas de modification de la description");
-          }
-
-          if(existingTask.deadline !== taskData.deadline) {
-              const uDeadline = await window.api.tasks.updateDeadline(updatedTask.id, updatedTask.deadline);
-              if(uDeadline.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Échéance modifiée");
-              } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Échéance non modifiée -", uDeadline.error);
-                  editSuccess = false;
-                  showNotification("L'échéance de la tâche n'a pas pu être modifiée.", 'error');
-              }
-          } else {
-              console.log("✏️ Tâche", updatedTask.id, ": Pas de modification de l'échéance");
-          }
-          
-          if(existingTask.priority !== taskData.priority) {
-              const uPrio = await window.api.tasks.updatePriority(updatedTask.id, updatedTask.priority);
-              if(uPrio.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Priorité modifiée");
-              } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Priorité non modifiée -", uPrio.error);
-                  editSuccess = false;
-                  showNotification("Le niveau de priorité de la tâche n'a pas pu être modifié.", 'error');
-              }
-          } else {
-              console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du niveau de priorité");
-          }
-
-          if(existingTask.status !== taskData.status) {
-              const uStatus = await window.api.tasks.updateStatus(updatedTask.id, updatedTask.status);
-              if(uStatus.success) {
-                  console.log("✏️ ✅ Tâche", updatedTask.id, ": Statut modifié");
-                  const progressProject = await window.api.projects.updateProgressDate(updatedTask.project_id);
-                  if(progressProject.success) {
-                    console.log("✅ Avancement du projet");
-                  } else {
-                    console.log("❌ L'avancement du projet a échoué");
-                  }
-              } else {
-                  console.log("✏️ ❌ Tâche", updatedTask.id, ": Statut non modifié -", uStatus.error);
-                  editSuccess = false;
-                  showNotification("Le statut de la tâche n'a pas pu être modifié.", 'error');
-              }
-          } else {
-              console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du statut");
-          }
-          
-          if(editSuccess) {
-              showNotification("Tâche " + updatedTask.title + " modifiée !")
           }
 
       await loadStats();
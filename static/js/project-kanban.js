@@ -37,6 +37,9 @@ class Kanban {
             this.initEventListeners();
             this.loadProjectsInModal();
 
+            // Rafraîchir quand une autre fenêtre modifie les données
+            window.api.events.subscribe(() => this.loadTasks());
+
         } catch (error) {
             console.error('❌ Erreur initialisation :', error);
             showNotification('Erreur : Erreur lors du chargement du projet', 'error');
@@ -66,12 +69,13 @@ class Kanban {
 
     async loadTasks() {
         try {
-            let req = {};
-            if(this.projectId) {
-                req = await window.api.tasks.getByProjectId(this.projectId);
-            } else {
-                req = await window.api.tasks.getAll();
-            }
+            // Filtre de priorité et tri appliqués par le serveur
+            const req = await window.api.tasks.getFiltered({
+                project_id: this.projectId,
+                include: this.projectId ? null : 'project',
+                priority: this.filterPriority,
+                sort: (this.sortOrder === 'desc' ? '-' : '') + this.sortBy
+            });
             if(req.success) {
                 this.tasks = req.data;
                 console.log("✅ Tâches chargées", this.tasks)
@@ -100,8 +104,8 @@ class Kanban {
         
         console.log("✅ Colonnes réinitialisées");
 
-        // Récupérer les tâches filtrées et triées
-        const sortedTasks = this.getFilteredAndSortedTasks();
+        // Tâches déjà filtrées et triées par le serveur
+        const sortedTasks = this.tasks;
 
         // Grouper par statut
         const tasksByStatus = {
@@ -161,11 +165,9 @@ class Kanban {
         }
         
         let projectHTML = '';
-        if (!this.projectId) {
-            const project = await window.api.projects.getById(task.project_id);
-            if(project.success) {
-                projectHTML = `<div class="task-project"><span>📂 ${project.data.name}</span></div>`;
-            }
+        if (!this.projectId && task.project_name) {
+            // Nom du projet joint par le serveur (include=project)
+            projectHTML = `<div class="task-project"><span>📂 ${task.project_name}</span></div>`;
         }
 
         // Description tronquée (2 lignes max)
@@ -228,17 +230,17 @@ class Kanban {
         // Contrôles de tri
         document.getElementById('sort-by').addEventListener('change', (e) => {
             this.sortBy = e.target.value;
-            this.renderKanban();
+            this.loadTasks();
         });
 
         document.getElementById('sort-order').addEventListener('change', (e) => {
             this.sortOrder = e.target.value;
-            this.renderKanban();
+            this.loadTasks();
         });
 
         document.getElementById('filter-priority').addEventListener('change', (e) => {
             this.filterPriority = e.target.value;
-            this.renderKanban();
+            this.loadTasks();
         });
 
         // Fermeture modal
@@ -302,16 +304,10 @@ class Kanban {
             this.draggedTask.status = newStatus;
             this.draggedTask.modifiedAt = new Date().toISOString();
             
-            // await window.api.tasks.updateTask(this.projectId, this.draggedTask.id, this.draggedTask);
-            const req = await window.api.tasks.updateStatus(this.draggedTask.id, newStatus);
+            // L'avancement du projet est mis à jour côté serveur dans la même transaction
+            const req = await window.api.tasks.update(this.draggedTask.id, { status: newStatus });
             if(req.success) {
                 console.log("✅ Tâche", this.draggedTask.title, "modifié de", exStatus, "à", newStatus);
-                const progressProject = await window.api.projects.updateProgressDate(this.draggedTask.project_id);
-                if(progressProject.success) {
-                    console.log("✅ Avancement du projet");
-                } else {
-                    console.log("❌ L'avancement du projet a échoué");
-                }
                 showNotification("Statut de la tâche " + this.draggedTask.title + " changé !");
             } else {
                 console.log("❌ Erreur changement statut", req.error);
@@ -323,61 +319,6 @@ class Kanban {
         this.draggedTask = null;
     }
 
-    // ============================================
-    // 🔄 TRI ET FILTRAGE
-    // ============================================
-
-    getFilteredAndSortedTasks() {
-        let tasks = [...this.tasks];
-
-        // 1️⃣ Filtrer par priorité
-        if (this.filterPriority !== 'all') {
-            tasks = tasks.filter(task => task.priority === this.filterPriority);
-        }
-
-        // 2️⃣ Trier
-        tasks.sort((a, b) => {
-            let comparison = 0;
-
-            switch (this.sortBy) {
-                case 'creation_date':
-                    comparison = new Date(a.creation_date) - new Date(b.creation_date);
-                    break;
-
-                case 'deadline':
-                    // Mettre les tâches sans deadline à la fin
-                    if (!a.deadline && !b.deadline) comparison = 0;
-                    else if (!a.deadline) comparison = 1;
-                    else if (!b.deadline) comparison = -1;
-                    else comparison = new Date(a.deadline) - new Date(b.deadline);
-                    break;
-
-                case 'priority':
-                    const priorityOrder = { 'high': 3, 'medium': 2, 'low': 1 };
-                    comparison = (priorityOrder[b.priority] || 2) - (priorityOrder[a.priority] || 2);
-                    break;
-
-                case 'title':
-                    comparison = a.title.localeCompare(b.title, 'fr', { sensitivity: 'base' });
-                    break;
-
-                case 'last_update_date':
-                    const dateA = a.last_update_date || a.creation_date;
-                    const dateB = b.last_update_date || b.creation_date;
-                    comparison = new Date(dateA) - new Date(dateB);
-                    break;
-
-                default:
-                    comparison = 0;
-            }
-
-            // Inverser si ordre décroissant
-            return this.sortOrder === 'desc' ? -comparison : comparison;
-        });
-
-        return tasks;
-    }
-
     // ============================================
     // 📝 GESTION DES MODALS
     // ============================================
@@ -499,100 +440,28 @@ class Kanban {
             if (this.editingTaskId) {
                 // Mise à jour
                 const existingTask = this.tasks.find(t => t.id === this.editingTaskId);
-                const updatedTask = {
-                    ...existingTask,
-                    ...taskData,
-                    modifiedAt: new Date().toISOString()
-                };
 
-                let editSuccess = true;
-                
-                if(existingTask.project_id !== taskData.project_id) {
-                    const uProject = await window.api.tasks.updateProjectId(existingTask.id, updatedTask.project_id);
-                    if(uProject.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Projet modifié");
-                    } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Projet non modifié -", uProject.error);
-                        editSuccess = false;
-                        showNotification("Le projet de la tâche n'a pas pu être modifié.", 'error');
+                // Un seul PATCH avec uniquement les champs modifiés
+                const changes = {};
+                ['project_id', 'title', 'description', 'deadline', 'priority', 'status'].forEach(field => {
+                    // L'échéance est stockée en 'AAAA-MM-JJ HH:MM:SS', le formulaire ne manipule que la date
+                    const current = field === 'deadline' ? (existingTask.deadline || '').slice(0, 10) : existingTask[field];
+                    if (String(current ?? '') !== String(taskData[field] ?? '')) {
+                        changes[field] = taskData[field];
                     }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification du projet");
-                }
-
-                if(existingTask.title !== taskData.title) {
-                    const uTitle = await window.api.tasks.updateTitle(existingTask.id, updatedTask.title);
-                    if(uTitle.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Titre modifié");
-                    } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Titre non modifié -", uTitle.error);
-                        editSuccess = false;
-                        showNotification("Le titre de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification du titre");
-                }
+                });
 
-                if(existingTask.description !== taskData.description) {
-                    const uDesc = await window.api.tasks.updateDescription(existingTask.id, updatedTask.description);
-                    if(uDesc.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Description modifiée");
-                    } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Description non modifiée -", uDesc.error);
-                        editSuccess = false;
-                        showNotification("La description de la tâche n'a pas pu être modifiée.", 'error');
-                    }
+                if (Object.keys(changes).length === 0) {
+                    console.log("✏️ Tâche", existingTask.id, ": Aucune modification");
                 } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification de la description");
-                }
-
-                if(existingTask.deadline !== taskData.deadline) {
-                    const uDeadline = await window.api.tasks.updateDeadline(existingTask.id, updatedTask.deadline);
-                    if(uDeadline.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Échéance modifiée");
+                    const uTask = await window.api.tasks.update(existingTask.id, changes);
+                    if(uTask.success) {
+                        console.log("✏️ ✅ Tâche", existingTask.id, ": Champs modifiés -", Object.keys(changes));
+                        showNotification("Tâche " + taskData.title + " modifiée !")
                     } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Échéance non modifiée -", uDeadline.error);
-                        editSuccess = false;
-                        showNotification("L'échéance de la tâche n'a pas pu être modifiée.", 'error');
+                        console.log("✏️ ❌ Tâche", existingTask.id, ": Non modifiée -", uTask.error);
+                        showNotification("La tâche n'a pas pu être modifiée.", 'error');
                     }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification de l'échéance");
-                }
-                
-                if(existingTask.priority !== taskData.priority) {
-                    const uPrio = await window.api.tasks.updatePriority(existingTask.id, updatedTask.priority);
-                    if(uPrio.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Priorité modifiée");
-                    } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Priorité non modifiée -", uPrio.error);
-                        editSuccess = false;
-                        showNotification("Le niveau de priorité de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification du niveau de priorité");
-                }
-
-                if(existingTask.status !== taskData.status) {
-                    const uStatus = await window.api.tasks.updateStatus(existingTask.id, updatedTask.status);
-                    if(uStatus.success) {
-                        console.log("✏️ ✅ Tâche", existingTask.id, ": Statut modifié");
-                        const progressProject = await window.api.projects.updateProgressDate(existingTask.project_id);
-                        if(progressProject.success) {
-                            console.log("✅ Avancement du projet");
-                        } else {
-                            console.error("❌ L'avancement du projet a échoué");
-                        }
-                    } else {
-                        console.log("✏️ ❌ Tâche", existingTask.id, ": Statut non modifié -", uStatus.error);
-                        editSuccess = false;
-                        showNotification("Le statut de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification du statut");
-                }
-                
-                if(editSuccess) {
-                    showNotification("Tâche " + updatedTask.title + " modifiée !")
                 }
 
             } else {
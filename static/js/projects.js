@@ -2,7 +2,7 @@ class Projects {
     constructor() { }
 
     async getAll() {
-        const result = await window.api.projects.getAll();
+        const result = await window.api.projects.getAllWithStats();
         console.log("📂 Projets récupérés", result);
         return result;
     }
@@ -56,13 +56,12 @@ class Projects {
             
             container.innerHTML = "";
 
-            const projectInstances = await Promise.all(
-                projects.data.map(async (project) => {
-                    const p = new Project();
-                    await p.loadById(project.id);  // ✅ Maintenant on attend !
-                    return { project, instance: p };
-                })
-            );
+            // Statistiques déjà incluses dans la réponse : aucune requête par projet
+            const projectInstances = projects.data.map(project => {
+                const p = new Project();
+                p.load(project);
+                return { project, instance: p };
+            });
 
             projectInstances.forEach(({ project, instance: p }) => {
                 const projectCard = document.createElement('div');
@@ -287,18 +286,32 @@ class Project {
         return  this.name;
     }
 
+    load(data) {
+        this.id = data.id;
+        this.name = data.name;
+        this.description = data.description;
+        this.creation_date = data.creation_date;
+        this.last_update_date = data.last_update_date;
+        this.last_progress_date = data.last_progress_date;
+
+        // Statistiques calculées par le serveur (GET /api/projects?include=stats)
+        if (data.stats) {
+            this.stats = {
+                todo: data.stats.todo,
+                inProgress: data.stats.in_progress,
+                done: data.stats.done,
+                total: data.stats.total,
+                load: data.stats.load,
+                overdue: data.stats.overdue
+            };
+        }
+    }
+
     async loadById(id) {
         try {
-            const p = await window.api.projects.getById(id);
-    
-            this.id = p.data.id;
-            this.name = p.data.name;
-            this.description = p.data.description;
-            this.creation_date = p.data.creation_date;
-            this.last_update_date = p.data.last_update_date;
-            this.last_progress_date = p.data.last_progress_date;
+            const p = await window.api.projects.getByIdWithStats(id);
     
-            await this.getStats()
+            this.load(p.data);
 
             if(p.success) {
                 console.log("📥 Projet chargé", p)
@@ -342,26 +355,14 @@ class Project {
     }
 
     async getStats() {
-        await this.loadTasks();
-
-        this.tasks.forEach(task => {
-            this.stats.total = this.stats.total + 1;
-            switch (task.status) {
-                case "todo":
-                    this.stats.todo = this.stats.todo + 1;
-                    break;
-                case "in-progress":
-                    this.stats.inProgress = this.stats.inProgress + 1;
-                    break;
-                case "done":
-                    this.stats.done = this.stats.done + 1;
-                    break;
-                default:
-                    break;
-            }
-        });
+        // Compteurs maintenus par le serveur (table project_stats)
+        const p = await window.api.projects.getByIdWithStats(this.id);
+        if(p.success) {
+            this.load(p.data);
+        } else {
+            console.error("❌ Chargement statistiques du projet :", p.error);
+        }
         console.log("📊 Statistiques du projet chargées -", this.id, this.stats);
-        
     }
 
 }
@@ -25,9 +25,11 @@ class Timeline {
     async init() {
         try {
             await this.loadProjects();
-            await this.loadTasks();
             this.initEventListeners();
-            this.render();
+            await this.refresh();
+
+            // Rafraîchir quand une autre fenêtre modifie les données
+            window.api.events.subscribe(() => this.refresh());
 
             this.loadProjectsInModal()
         } catch (error) {
@@ -42,7 +44,20 @@ class Timeline {
 
     async loadTasks() {
         try {
-            const result = await window.api.tasks.getAll();
+            // Statut, projet et période filtrés côté serveur
+            const filters = {
+                status: this.filters.status,
+                project_id: this.filters.project
+            };
+
+            if (this.filters.period !== 'all' && this.filters.dateType !== 'both') {
+                const { start, end } = this.getPeriodDates();
+                const prefix = this.filters.dateType === 'deadline' ? 'deadline' : 'created';
+                filters[`${prefix}_from`] = start.toLocaleDateString('sv-SE');
+                filters[`${prefix}_to`] = end.toLocaleDateString('sv-SE');
+            }
+
+            const result = await window.api.tasks.getFiltered(filters);
             if (result.success) {
                 this.tasks = result.data;
                 console.log('✅ Tâches chargées:', this.tasks.length);
@@ -65,6 +80,11 @@ class Timeline {
         }
     }
 
+    async refresh() {
+        await this.loadTasks();
+        this.render();
+    }
+
     populateProjectFilter() {
         const select = document.getElementById('project-filter');
         const defaultOption = select.querySelector('option[value="all"]');
@@ -89,25 +109,25 @@ class Timeline {
             this.filters.period = e.target.value;
             const customPeriod = document.getElementById('custom-period');
             customPeriod.style.display = e.target.value === 'custom' ? 'flex' : 'none';
-            this.render();
+            this.refresh();
         });
 
         // Filtre type de date
         document.getElementById('date-type').addEventListener('change', (e) => {
             this.filters.dateType = e.target.value;
-            this.render();
+            this.refresh();
         });
 
         // Filtre statut
         document.getElementById('status-filter').addEventListener('change', (e) => {
             this.filters.status = e.target.value;
-            this.render();
+            this.refresh();
         });
 
         // Filtre projet
         document.getElementById('project-filter').addEventListener('change', (e) => {
             this.filters.project = e.target.value;
-            this.render();
+            this.refresh();
         });
 
         // Période personnalisée
@@ -118,7 +138,7 @@ class Timeline {
             if (start && end) {
                 this.filters.customStart = new Date(start);
                 this.filters.customEnd = new Date(end);
-                this.render();
+                this.refresh();
             } else {
                 showNotification('Veuillez sélectionner les deux dates', 'error');
             }
@@ -150,7 +170,7 @@ class Timeline {
         const now = new Date();
         let filtered = [...this.tasks];
 
-        // 1️⃣ Filtrer par période
+        // Filtrer par période (affinage local, indispensable pour le type de date "les deux")
         const { start, end } = this.getPeriodDates();
         
         filtered = filtered.filter(task => {
@@ -159,21 +179,7 @@ class Timeline {
             return taskDate >= start && taskDate <= end;
         });
 
-        // 2️⃣ Filtrer par statut
-        if (this.filters.status !== 'all') {
-            if (this.filters.status === 'active') {
-                filtered = filtered.filter(t => t.status === 'todo' || t.status === 'in-progress');
-            } else if (this.filters.status === 'done') {
-                filtered = filtered.filter(t => t.status === 'done');
-            } else {
-                filtered = filtered.filter(t => t.status === this.filters.status);
-            }
-        }
-
-        // 3️⃣ Filtrer par projet
-        if (this.filters.project !== 'all') {
-            filtered = filtered.filter(t => t.project_id === parseInt(this.filters.project));
-        }
+        // Statut et projet : déjà filtrés par le serveur (cf. loadTasks)
 
         return filtered;
     }
@@ -568,101 +574,29 @@ class Timeline {
       
         try {
                 // Mise à jour
-                const existingTask = await window.api.tasks.getById(taskId);
-                const updatedTask = {
-                    ...existingTask,
-                    ...taskData,
-                    modifiedAt: new Date().toISOString()
-                };
-      
-                let editSuccess = true;
-                
-                if(existingTask.project_id !== taskData.project_id) {
-                    const uProject = await window.api.tasks.updateProjectId(updatedTask.id, updatedTask.project_id);
-                    if(uProject.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Projet modifié");
-                    } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Projet non modifié -", uProject.error);
-                        editSuccess = false;
-                        showNotification("Le projet de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du projet");
-                }
-      
-                if(existingTask.title !== taskData.title) {
-                    const uTitle = await window.api.tasks.updateTitle(updatedTask.id, updatedTask.title);
-                    if(uTitle.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Titre modifié");
-                    } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Titre non modifié -", uTitle.error);
-                        editSuccess = false;
-                        showNotification("Le titre de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", existingTask.id, ": Pas de modification du titre");
-                }
-      
-                if(existingTask.description !== taskData.description) {
-                    const uDesc = await window.api.tasks.updateDescription(updatedTask.id, updatedTask.description);
-                    if(uDesc.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Description modifiée");
-                    } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Description non modifiée -", uDesc.error);
-                        editSuccess = false;
-                        showNotification("La description de la tâche n'a pas pu être modifiée.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", updatedTask.id, ": Pas de modification de la description");
-                }
-      
-                if(existingTask.deadline !== taskData.deadline) {
-                    const uDeadline = await window.api.tasks.updateDeadline(updatedTask.id, updatedTask.deadline);
-                    if(uDeadline.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Échéance modifiée");
-                    } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Échéance non modifiée -", uDeadline.error);
-                        editSuccess = false;
-                        showNotification("L'échéance de la tâche n'a pas pu être modifiée.", 'error');
+                const existingTask = (await window.api.tasks.getById(taskId)).data;
+
+                // Un seul PATCH avec uniquement les champs modifiés
+                const changes = {};
+                ['project_id', 'title', 'description', 'deadline', 'priority', 'status'].forEach(field => {
+                    // L'échéance est stockée en 'AAAA-MM-JJ HH:MM:SS', le formulaire ne manipule que la date
+                    const current = field === 'deadline' ? (existingTask.deadline || '').slice(0, 10) : existingTask[field];
+                    if (String(current ?? '') !== String(taskData[field] ?? '')) {
+                        changes[field] = taskData[field];
                     }
+                });
+
+                if (Object.keys(changes).length === 0) {
+                    console.log("✏️ Tâche", taskId, ": Aucune modification");
                 } else {
-                    console.log("✏️ Tâche", updatedTask.id, ": Pas de modification de l'échéance");
-                }
-                
-                if(existingTask.priority !== taskData.priority) {
-                    const uPrio = await window.api.tasks.updatePriority(updatedTask.id, updatedTask.priority);
-                    if(uPrio.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Priorité modifiée");
+                    const uTask = await window.api.tasks.update(taskId, changes);
+                    if(uTask.success) {
+                        console.log("✏️ ✅ Tâche", taskId, ": Champs modifiés -", Object.keys(changes));
+                        showNotification("Tâche " + taskData.title + " modifiée !")
                     } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Priorité non modifiée -", uPrio.error);
-                        editSuccess = false;
-                        showNotification("Le niveau de priorité de la tâche n'a pas pu être modifié.", 'error');
+                        console.log("✏️ ❌ Tâche", taskId, ": Non modifiée -", uTask.error);
+                        showNotification("La tâche n'a pas pu être modifiée.", 'error');
                     }
-                } else {
-                    console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du niveau de priorité");
-                }
-      
-                if(existingTask.status !== taskData.status) {
-                    const uStatus = await window.api.tasks.updateStatus(updatedTask.id, updatedTask.status);
-                    if(uStatus.success) {
-                        console.log("✏️ ✅ Tâche", updatedTask.id, ": Statut modifié");
-                        const progressProject = await window.api.projects.updateProgressDate(updatedTask.project_id);
-                        if(progressProject.success) {
-                          console.log("✅ Avancement du projet");
-                        } else {
-                          console.log("❌ L'avancement du projet a échoué");
-                        }
-                    } else {
-                        console.log("✏️ ❌ Tâche", updatedTask.id, ": Statut non modifié -", uStatus.error);
-                        editSuccess = false;
-                        showNotification("Le statut de la tâche n'a pas pu être modifié.", 'error');
-                    }
-                } else {
-                    console.log("✏️ Tâche", updatedTask.id, ": Pas de modification du statut");
-                }
-                
-                if(editSuccess) {
-                    showNotification("Tâche " + updatedTask.title + " modifiée !")
                 }
       
             await this.loadTasks();
@@ -0,0 +1,53 @@
+"""
+Configuration des tests OPAC
+L'application est importée sur une base temporaire (OPAC_DB_PATH), jamais sur tasks.db.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Avant tout import de app : base, sauvegardes et cache de lecture propres aux tests
+TEST_DIR = tempfile.mkdtemp(prefix='opac-tests-')
+# Enregistré avant l'import de app : supprimé après la fermeture de ses connexions
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+os.environ['OPAC_DB_PATH'] = os.path.join(TEST_DIR, 'tasks.db')
+os.environ['OPAC_BACKUP_DIR'] = os.path.join(TEST_DIR, 'backups')
+os.environ['OPAC_BACKUP_INTERVAL'] = '0'
+os.environ['OPAC_READ_CACHE_VALIDATE_MS'] = '0'
+
+from init_db import init_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base vierge, migrée à la dernière version du schéma"""
+    path = str(tmp_path / 'tasks.db')
+    init_database(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def opac():
+    """Module app, importé une seule fois (pool, file d'écriture et cache partagés par les tests)"""
+    import app
+    return app
+
+
+@pytest.fixture
+def client(opac):
+    return opac.app.test_client()
+
+
+@pytest.fixture
+def project_id(client):
+    """Projet vide propre au test"""
+    response = client.post('/api/projects', json={'name': 'Projet de test'})
+    return response.get_json()['data']['id']
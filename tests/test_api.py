@@ -0,0 +1,84 @@
+"""
+Tests des routes de l'API : file d'écriture saturée (503), filtres de GET /api/tasks,
+validation des PATCH et ETag
+"""
+
+import threading
+
+import pytest
+
+
+def test_write_timeout_answers_503_and_is_never_committed(client, project_id, opac, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait(10)
+
+    # Thread d'écriture occupé par une modification exclusive
+    monkeypatch.setattr(opac.write_queue, 'timeout', 0.05)
+    blocker = opac.write_queue.submit(block, exclusive=True)
+    try:
+        assert started.wait(5)
+        response = client.post('/api/tasks', json={'title': 'annulée', 'project_id': project_id})
+    finally:
+        release.set()
+        blocker.result(5)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(opac.WRITE_RETRY_AFTER_SECONDS)
+    assert response.get_json()['success'] is False
+
+    # Nouvelle modification : la précédente n'a pas été exécutée entre-temps
+    assert client.post('/api/tasks', json={'title': 'réessai', 'project_id': project_id}).status_code == 201
+    titles = [task['title'] for task in client.get(f'/api/tasks?project_id={project_id}').get_json()['data']]
+    assert titles == ['réessai']
+
+
+def test_deadline_filters_use_canonical_format(client, project_id):
+    task_id = client.post('/api/tasks', json={
+        'title': 'échéance', 'project_id': project_id, 'deadline': '2026-01-01T12:00'
+    }).get_json()['data']['id']
+
+    def found(query):
+        response = client.get(f'/api/tasks?project_id={project_id}&{query}')
+        assert response.status_code == 200
+        return task_id in [task['id'] for task in response.get_json()['data']]
+
+    assert found('deadline_from=2026-01-01T10:00')
+    assert found('deadline_from=2026-01-01&deadline_to=2026-01-01')
+    assert found('deadline_to=2026-01-01T12:00')
+    assert not found('deadline_to=2026-01-01T11:59')
+    assert not found('deadline_from=2026-01-02')
+
+
+@pytest.mark.parametrize('query', ['deadline_from=demain', 'created_to=2026-13-01', 'limit=dix', 'project_id=abc'])
+def test_invalid_task_filters_answer_400(client, query):
+    response = client.get(f'/api/tasks?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('body', [['title'], 'texte', {'status': 'bloquée'}])
+def test_patch_task_rejects_invalid_data(client, project_id, body):
+    task_id = client.post('/api/tasks', json={'title': 't', 'project_id': project_id}).get_json()['data']['id']
+
+    response = client.patch(f'/api/tasks/{task_id}', json=body)
+
+    assert response.status_code == 400
+    assert client.get(f'/api/tasks/{task_id}').get_json()['data']['status'] == 'todo'
+
+
+def test_etag_is_identical_on_compressed_plain_and_304_responses(client, project_id):
+    for i in range(20):
+        client.post('/api/tasks', json={'title': f'tâche assez longue pour compresser {i}', 'project_id': project_id})
+
+    compressed = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/api/tasks', headers={'Accept-Encoding': 'identity'})
+    not_modified = client.get('/api/tasks', headers={'If-None-Match': plain.headers['ETag']})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert not_modified.status_code == 304
+    assert compressed.headers['ETag'] == plain.headers['ETag'] == not_modified.headers['ETag']
+    assert plain.headers['ETag'].startswith('W/')
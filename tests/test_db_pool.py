@@ -0,0 +1,56 @@
+"""
+Tests du pool de connexions (db_pool.ConnectionPool)
+"""
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, size=1, timeout=0.05)
+    yield pool
+    pool.close_all()
+
+
+def test_release_rolls_back_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute('BEGIN')
+    conn.execute("INSERT INTO projects (name) VALUES ('jamais validé')")
+    pool.release(conn)
+
+    again = pool.acquire()
+    assert again is conn
+    assert not again.in_transaction
+    assert again.execute('SELECT COUNT(*) FROM projects').fetchone()[0] == 0
+    pool.release(again)
+
+
+def test_acquire_waits_for_release(pool):
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats() == {'size': 1, 'open': 1, 'idle': 0}
+
+
+def test_resize_closes_extra_connections_on_release(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    first, second = pool.acquire(), pool.acquire()
+    pool.resize(1)
+
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.stats() == {'size': 1, 'open': 1, 'idle': 1}
+    pool.close_all()
+
+
+def test_closed_pool_discards_released_connections(pool):
+    conn = pool.acquire()
+    pool.close_all()
+    pool.release(conn)
+    assert pool.stats()['open'] == 0
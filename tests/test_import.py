@@ -0,0 +1,123 @@
+"""
+Tests de POST /api/import : triggers d'insertion suspendus pendant les paquets,
+tables dérivées (project_stats, tasks_fts, change_log) identiques à une reconstruction complète
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from migrations import rebuild_project_stats
+
+STATUSES = ('todo', 'in-progress', 'done')
+
+
+@pytest.fixture
+def small_chunks(opac, monkeypatch):
+    # Plusieurs paquets (donc plusieurs passages sur le thread d'écriture) pour quelques lignes
+    monkeypatch.setattr(opac, 'IMPORT_CHUNK_ROWS', 7)
+
+
+@pytest.fixture
+def db(opac):
+    conn = sqlite3.connect(opac.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def ndjson(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+def import_tasks(client, rows, query=''):
+    response = client.post(f'/api/import?format=ndjson{query}', data=ndjson(rows),
+                           content_type='application/x-ndjson')
+    return response.status_code, response.get_json()
+
+
+def stats_rows(conn):
+    return [tuple(row) for row in conn.execute('SELECT * FROM project_stats ORDER BY project_id')]
+
+
+def fts_matches(conn, word):
+    return [row[0] for row in conn.execute('SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ? ORDER BY rowid', (word,))]
+
+
+def test_import_matches_full_rebuild(client, db, small_chunks):
+    rows = [
+        {
+            'title': f'Tâche importée {i} zéphyr{i % 3}',
+            'description': 'lot de reprise',
+            'status': STATUSES[i % 3],
+            'load': i * 0.5,
+            'project': f'Import {i % 4}',
+        }
+        for i in range(30)
+    ]
+    status, body = import_tasks(client, rows)
+    assert status == 200
+    assert body['data']['inserted'] == 30
+    assert body['data']['projects_created'] == 4
+
+    imported = stats_rows(db)
+    words = ['zéphyr0', 'zéphyr1', 'zéphyr2', 'reprise']
+    matches = {word: fts_matches(db, word) for word in words}
+    assert len(matches['reprise']) >= 30
+
+    # Reconstruction complète dans une transaction annulée : mêmes résultats attendus
+    db.execute('BEGIN')
+    try:
+        rebuild_project_stats(db)
+        db.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+        assert stats_rows(db) == imported
+        assert {word: fts_matches(db, word) for word in words} == matches
+    finally:
+        db.rollback()
+
+    db.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('integrity-check')")
+
+
+def test_import_feeds_change_log_and_revisions(client, db, project_id, small_chunks):
+    revision = db.execute("SELECT revision FROM data_revisions WHERE name = 'tasks'").fetchone()[0]
+    since = db.execute('SELECT COALESCE(MAX(revision), 0) FROM change_log').fetchone()[0]
+
+    status, body = import_tasks(client, [{'title': f'suivi {i}', 'project_id': project_id} for i in range(10)])
+    assert status == 200
+
+    assert db.execute("SELECT revision FROM data_revisions WHERE name = 'tasks'").fetchone()[0] > revision
+    changes = client.get(f'/api/changes?since={since}').get_json()['data']
+    assert sorted(task['title'] for task in changes['tasks']) == sorted(f'suivi {i}' for i in range(10))
+
+    # Triggers de nouveau actifs après l'import
+    assert db.execute('SELECT COUNT(*) FROM bulk_import').fetchone()[0] == 0
+    client.post('/api/tasks', json={'title': 'après import', 'project_id': project_id, 'status': 'done'})
+    stats = db.execute('SELECT total, done FROM project_stats WHERE project_id = ?', (project_id,)).fetchone()
+    assert tuple(stats) == (11, 1)
+    assert fts_matches(db, 'après')
+
+
+def test_import_is_visible_in_read_cache(client, project_id):
+    assert client.get(f'/api/tasks?project_id={project_id}').get_json()['data'] == []
+
+    status, _ = import_tasks(client, [{'title': f'c{i}', 'project_id': project_id} for i in range(3)])
+    assert status == 200
+
+    tasks = client.get(f'/api/tasks?project_id={project_id}').get_json()['data']
+    assert sorted(task['title'] for task in tasks) == ['c0', 'c1', 'c2']
+
+
+def test_invalid_rows_are_rejected_without_creating_projects(client, db):
+    rows = [
+        {'title': 'valide', 'project': 'Projet valide'},
+        {'title': 'date illisible', 'project': 'Projet fantôme', 'creation_date': 'pas-une-date'},
+        {'title': 'statut inconnu', 'project': 'Projet fantôme', 'status': 'bloquée'},
+        {'project': 'Projet fantôme'},
+    ]
+    status, body = import_tasks(client, rows)
+    assert status == 200
+    assert body['data']['inserted'] == 1
+    assert body['data']['rejected'] == 3
+    assert [error['line'] for error in body['data']['errors']] == [2, 3, 4]
+    assert db.execute("SELECT COUNT(*) FROM projects WHERE name = 'Projet fantôme'").fetchone()[0] == 0
@@ -0,0 +1,123 @@
+"""
+Tests du cache de lecture (read_cache.ReadCache) : invalidation par la file d'écriture,
+détection des commits des autres processus et mise à jour par change_log
+"""
+
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from read_cache import ReadCache
+from writer import WriteQueue
+
+
+@pytest.fixture
+def cache(db_path):
+    cache = ReadCache(db_path, validate_interval=0)
+    yield cache
+    cache.close()
+
+
+def execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(sql, params)
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def test_reflects_writes_from_another_process(cache, db_path):
+    project_id = execute(db_path, "INSERT INTO projects (name) VALUES ('P')")
+    assert cache.tasks() == []
+
+    script = (
+        'import sqlite3, sys\n'
+        'conn = sqlite3.connect(sys.argv[1])\n'
+        "conn.execute(\"INSERT INTO tasks (title, project_id, status) VALUES ('externe', ?, 'done')\", (int(sys.argv[2]),))\n"
+        'conn.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script, db_path, str(project_id)], check=True)
+
+    tasks = cache.tasks(project_ids=[project_id])
+    assert [task['title'] for task in tasks] == ['externe']
+    assert [task['title'] for task in cache.tasks(statuses=['done'])] == ['externe']
+    assert cache.stats()['reloads'] == 1
+
+
+def test_reflects_deletes(cache, db_path):
+    project_id = execute(db_path, "INSERT INTO projects (name) VALUES ('P')")
+    task_id = execute(db_path, "INSERT INTO tasks (title, project_id) VALUES ('à supprimer', ?)", (project_id,))
+    assert cache.task(task_id)['title'] == 'à supprimer'
+
+    execute(db_path, 'DELETE FROM tasks WHERE id = ?', (task_id,))
+
+    assert cache.task(task_id) is None
+    assert cache.tasks(project_ids=[project_id]) == []
+    assert cache.tasks(statuses=['todo']) == []
+
+    # Suppression du projet : ses tâches partent en cascade (triggers de change_log compris)
+    execute(db_path, "INSERT INTO tasks (title, project_id) VALUES ('en cascade', ?)", (project_id,))
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+    conn.commit()
+    conn.close()
+
+    assert cache.project(project_id) is None
+    assert cache.tasks() == []
+
+
+def test_status_change_moves_task_between_indexes(cache, db_path):
+    project_id = execute(db_path, "INSERT INTO projects (name) VALUES ('P')")
+    task_id = execute(db_path, "INSERT INTO tasks (title, project_id) VALUES ('t', ?)", (project_id,))
+    assert [task['id'] for task in cache.tasks(statuses=['todo'])] == [task_id]
+
+    execute(db_path, "UPDATE tasks SET status = 'done' WHERE id = ?", (task_id,))
+
+    assert cache.tasks(statuses=['todo']) == []
+    assert [task['id'] for task in cache.tasks(statuses=['done'])] == [task_id]
+    assert cache.stats()['refreshes'] >= 1
+
+
+def test_writer_commit_invalidates(db_path):
+    # Sans revalidation périodique : seule l'invalidation par la file d'écriture rend la modification visible
+    cache = ReadCache(db_path, validate_interval=3600)
+    queue = WriteQueue(db_path, on_commit=cache.invalidate)
+    try:
+        assert cache.projects() == []
+        project_id = queue.execute(lambda conn: conn.execute("INSERT INTO projects (name) VALUES ('écrit')").lastrowid)
+        assert cache.project(project_id)['name'] == 'écrit'
+    finally:
+        queue.close()
+        cache.close()
+
+
+def test_reloads_when_too_many_changes(db_path):
+    cache = ReadCache(db_path, validate_interval=0, max_incremental=2)
+    try:
+        project_id = execute(db_path, "INSERT INTO projects (name) VALUES ('P')")
+        assert len(cache.projects()) == 1
+
+        conn = sqlite3.connect(db_path)
+        conn.executemany('INSERT INTO tasks (title, project_id) VALUES (?, ?)', [(f't{i}', project_id) for i in range(5)])
+        conn.commit()
+        conn.close()
+
+        assert len(cache.tasks(project_ids=[project_id])) == 5
+        assert cache.stats()['reloads'] == 2
+    finally:
+        cache.close()
+
+
+def test_revisions_follow_data_revisions(cache, db_path):
+    before = cache.revisions(['tasks', 'projects'])
+    execute(db_path, "INSERT INTO projects (name) VALUES ('P')")
+    after = cache.revisions(['tasks', 'projects'])
+
+    assert before[1] == after[1]
+    assert before[0] != after[0]
+    assert after[0].startswith('projects:')
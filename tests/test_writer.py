@@ -0,0 +1,135 @@
+"""
+Tests de la file d'écriture (writer.WriteQueue) : commit groupé, isolation par SAVEPOINT,
+annulation des modifications en attente après le délai
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from writer import WriteQueue, WriteQueueTimeout
+
+
+@pytest.fixture
+def write_queue(db_path):
+    # Fenêtre large : les modifications soumises ensemble forment un seul lot
+    queue = WriteQueue(db_path, window=0.2)
+    yield queue
+    queue.close()
+
+
+def insert_project(conn, name):
+    return conn.execute('INSERT INTO projects (name) VALUES (?)', (name,)).lastrowid
+
+
+def insert_then_fail(conn):
+    conn.execute("INSERT INTO projects (name) VALUES ('annulé')")
+    raise ValueError('échec volontaire')
+
+
+def project_names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT name FROM projects ORDER BY id')]
+    finally:
+        conn.close()
+
+
+def test_group_commits_once(db_path):
+    commits = []
+    queue = WriteQueue(db_path, window=0.2, on_commit=lambda: commits.append(1))
+    try:
+        futures = [queue.submit(insert_project, f'p{i}') for i in range(5)]
+        ids = [future.result(5) for future in futures]
+    finally:
+        queue.close()
+
+    assert len(set(ids)) == 5
+    assert commits == [1]
+    assert queue.stats()['batches'] == 1
+    assert queue.stats()['largest_batch'] == 5
+    assert project_names(db_path) == [f'p{i}' for i in range(5)]
+
+
+def test_failing_job_rolls_back_alone(write_queue, db_path):
+    first = write_queue.submit(insert_project, 'avant')
+    failing = write_queue.submit(insert_then_fail)
+    last = write_queue.submit(insert_project, 'après')
+
+    assert first.result(5)
+    with pytest.raises(ValueError, match='échec volontaire'):
+        failing.result(5)
+    assert last.result(5)
+
+    assert write_queue.stats()['largest_batch'] == 3
+    assert project_names(db_path) == ['avant', 'après']
+
+
+def test_single_failing_job_rolls_back(write_queue, db_path):
+    with pytest.raises(ValueError):
+        write_queue.execute(insert_then_fail)
+    assert write_queue.execute(insert_project, 'ensuite')
+    assert project_names(db_path) == ['ensuite']
+
+
+def test_timed_out_job_never_runs(write_queue, db_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait(5)
+
+    blocker = write_queue.submit(block, exclusive=True)
+    assert started.wait(5)
+
+    with pytest.raises(WriteQueueTimeout):
+        write_queue.execute(insert_project, 'trop tard', timeout=0.05)
+
+    release.set()
+    blocker.result(5)
+    write_queue.execute(insert_project, 'suivant')
+
+    assert project_names(db_path) == ['suivant']
+    assert write_queue.stats()['cancelled'] == 1
+
+
+def test_started_job_is_awaited_past_timeout(db_path):
+    queue = WriteQueue(db_path, window=0)
+    started = threading.Event()
+
+    def slow_insert(conn):
+        started.set()
+        time.sleep(0.3)
+        return insert_project(conn, 'lent')
+
+    try:
+        # Déjà en cours à l'expiration du délai : son issue réelle est renvoyée
+        assert queue.execute(slow_insert, timeout=0.1)
+    finally:
+        queue.close()
+
+    assert started.is_set()
+    assert project_names(db_path) == ['lent']
+    assert queue.stats()['cancelled'] == 0
+
+
+def test_exclusive_job_runs_outside_group(write_queue, db_path):
+    in_transaction = []
+    before = write_queue.submit(insert_project, 'a')
+    exclusive = write_queue.submit(lambda conn: in_transaction.append(conn.in_transaction), exclusive=True)
+    after = write_queue.submit(insert_project, 'b')
+
+    for future in (before, exclusive, after):
+        future.result(5)
+
+    assert in_transaction == [False]
+    assert project_names(db_path) == ['a', 'b']
+
+
+def test_closed_queue_rejects_jobs(write_queue):
+    write_queue.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        write_queue.submit(insert_project, 'fermée')
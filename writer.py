@@ -0,0 +1,260 @@
+"""
+File d'écriture OPAC : un seul thread possède la connexion d'écriture
+Les routes soumettent leurs modifications (fonctions appelées avec la connexion) et attendent
+le résultat ; le thread regroupe tout ce qui arrive dans une courte fenêtre en une seule
+transaction (commit groupé) : un fsync pour N modifications et plus de "database is locked".
+"""
+
+import sqlite3
+import threading
+import time
+import queue
+from concurrent.futures import Future
+
+
+class WriteQueueTimeout(sqlite3.OperationalError):
+    """Modification annulée avant d'avoir commencé : rien n'a été écrit, elle peut être soumise à nouveau"""
+
+
+# Valeur par défaut de execute(timeout=...) : None signifie "sans limite"
+DEFAULT_TIMEOUT = object()
+
+
+class WriteJob:
+    """Modification en attente : fn(conn, *args) et le futur de son résultat"""
+
+    def __init__(self, fn, args, exclusive):
+        self.fn = fn
+        self.args = args
+        self.exclusive = exclusive
+        self.future = Future()
+
+
+class WriteQueue:
+    """Thread d'écriture unique avec commit groupé"""
+
+    def __init__(self, db_path, setup=None, window=0.002, max_batch=256, timeout=30.0, on_commit=None,
+                 factory=sqlite3.Connection):
+        self.db_path = db_path
+        self.setup = setup
+        # Classe de la connexion d'écriture (cf. metrics.TimedConnection pour le journal des requêtes)
+        self.factory = factory
+        # Appelé après chaque commit, avant de répondre aux appelants (invalidation du cache de lecture)
+        self.on_commit = on_commit
+        self.window = window
+        self.max_batch = max(1, int(max_batch))
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        self._batches = 0
+        self._jobs = 0
+        self._largest_batch = 0
+        self._cancelled = 0
+
+    # ==================== SOUMISSION ====================
+
+    def submit(self, fn, *args, exclusive=False):
+        """Mettre une modification en file, retourne un Future.
+        fn(conn, *args) s'exécute dans une transaction partagée avec les autres modifications
+        du lot (isolée par un SAVEPOINT) et ne doit pas appeler commit().
+        exclusive : fn s'exécute seule, hors transaction (restauration, maintenance)."""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("File d'écriture fermée")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='opac-writer', daemon=True)
+                self._thread.start()
+            job = WriteJob(fn, args, exclusive)
+            self._queue.put(job)
+        return job.future
+
+    def execute(self, fn, *args, exclusive=False, timeout=DEFAULT_TIMEOUT):
+        """Soumettre une modification et attendre son commit, retourne le résultat de fn
+        (ou relance son exception).
+        timeout : attente maximale en secondes (self.timeout par défaut, None = sans limite).
+        Passé ce délai, une modification pas encore commencée est annulée (WriteQueueTimeout) ;
+        une modification déjà en cours est attendue jusqu'à son issue réelle, pour ne jamais
+        signaler un échec pour une écriture qui sera validée."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        future = self.submit(fn, *args, exclusive=exclusive)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if future.cancel():
+                self._cancelled += 1
+                raise WriteQueueTimeout(
+                    f"File d'écriture saturée : modification annulée après {timeout:g} s, rien n'a été écrit"
+                ) from None
+            return future.result()
+
+    def close(self):
+        """Terminer les modifications en attente puis arrêter le thread (arrêt du serveur)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(self.timeout)
+
+    def stats(self):
+        """Informations exposées par /api/health"""
+        return {
+            'pending': self._queue.qsize(),
+            'batches': self._batches,
+            'jobs': self._jobs,
+            'average_batch': round(self._jobs / self._batches, 2) if self._batches else 0,
+            'largest_batch': self._largest_batch,
+            'cancelled': self._cancelled,
+        }
+
+    # ==================== THREAD D'ÉCRITURE ====================
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys = ON')
+        if self.setup:
+            self.setup(conn)
+        return conn
+
+    def _collect(self, first):
+        """Lot de modifications : la première plus celles arrivées pendant la fenêtre.
+        Retourne (lot, arrêt demandé)."""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                job = self._queue.get()
+                if job is None:
+                    break
+                batch, stopping = self._collect(job)
+
+                # Les modifications exclusives coupent le lot et s'exécutent seules
+                group = []
+                for job in batch:
+                    if job.exclusive:
+                        self._commit_group(conn, group)
+                        group = []
+                        self._run_exclusive(conn, job)
+                    else:
+                        group.append(job)
+                self._commit_group(conn, group)
+
+            # Arrêt : vider ce qui reste en file
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    continue
+                if job.exclusive:
+                    self._run_exclusive(conn, job)
+                else:
+                    self._commit_group(conn, [job])
+        finally:
+            conn.close()
+
+    def _commit_group(self, conn, jobs):
+        """Exécuter un lot dans une transaction, un SAVEPOINT par modification, un seul commit"""
+        # Les modifications annulées (délai dépassé) sont ignorées, les autres ne peuvent plus l'être
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            # Modification seule : sa transaction lui sert d'isolation, pas de SAVEPOINT
+            # (évite le sous-journal des pages modifiées, coûteux pour les gros paquets d'import)
+            self._run_alone(conn, jobs[0])
+            return
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in jobs:
+                conn.execute('SAVEPOINT write_job')
+                try:
+                    result = job.fn(conn, *job.args)
+                    conn.execute('RELEASE write_job')
+                    outcomes.append((job, result, None))
+                except Exception as e:
+                    # Seule cette modification est annulée, le reste du lot continue
+                    conn.execute('ROLLBACK TO write_job')
+                    conn.execute('RELEASE write_job')
+                    outcomes.append((job, None, e))
+            conn.commit()
+            self._committed()
+        except Exception as e:
+            # Échec du commit (disque plein, base verrouillée par un autre processus...) : tout le lot échoue
+            if conn.in_transaction:
+                conn.rollback()
+            outcomes = [(job, None, error or e) for job, _, error in outcomes] + \
+                [(job, None, e) for job in jobs[len(outcomes):]]
+
+        self._count(len(jobs))
+
+        # Réponses après le commit : une modification signalée réussie est durable
+        for job, result, error in outcomes:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def _run_alone(self, conn, job):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            result = job.fn(conn, *job.args)
+            conn.commit()
+            self._committed()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        self._count(1)
+
+    def _committed(self):
+        if self.on_commit:
+            self.on_commit()
+
+    def _count(self, size):
+        self._batches += 1
+        self._jobs += size
+        self._largest_batch = max(self._largest_batch, size)
+
+    def _run_exclusive(self, conn, job):
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = job.fn(conn, *job.args)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # La tâche a pu valider une partie de ses modifications elle-même
+            self._committed()
+            job.future.set_exception(e)
+        else:
+            if conn.in_transaction:
+                conn.commit()
+            self._committed()
+            job.future.set_result(result)